@@ -7,7 +7,7 @@ Problem Q13: Allianz share forward contract with discrete dividend
 
 import math
 
-def calculate_forward_price_with_dividend(spot_price, dividend, dividend_time, risk_free_rate_div, risk_free_rate_maturity, maturity):
+def calculate_forward_price_with_dividend(spot_price, dividend, dividend_time, risk_free_rate_div, risk_free_rate_maturity, maturity, verbose=False):
     """
     Calculate forward price for a stock with a discrete dividend payment
     
@@ -21,6 +21,7 @@ def calculate_forward_price_with_dividend(spot_price, dividend, dividend_time, r
     - risk_free_rate_div: Interest rate for dividend period
     - risk_free_rate_maturity: Interest rate for full maturity period
     - maturity: Time to maturity of forward contract (years)
+    - verbose: Print the step-by-step calculation (the verification script turns it on)
     """
     
     # Calculate present value of dividend
@@ -29,24 +30,25 @@ def calculate_forward_price_with_dividend(spot_price, dividend, dividend_time, r
     # Calculate forward price
     forward_price = (spot_price - pv_dividend) * math.exp(risk_free_rate_maturity * maturity)
     
-    print(f"Forward Price Calculation with Discrete Dividend")
-    print(f"=" * 60)
-    print(f"Spot Price (S): €{spot_price:.2f}")
-    print(f"Dividend: €{dividend:.2f} in {dividend_time*12:.1f} months")
-    print(f"Risk-free rate (5 months): {risk_free_rate_div*100:.2f}%")
-    print(f"Risk-free rate (1 year): {risk_free_rate_maturity*100:.2f}%")
-    print(f"Maturity: {maturity} year")
-    print()
-    print(f"Step 1: Calculate PV of dividend")
-    print(f"  PV(Dividend) = {dividend} × e^(-{risk_free_rate_div:.4f} × {dividend_time:.4f})")
-    print(f"  PV(Dividend) = €{pv_dividend:.4f}")
-    print()
-    print(f"Step 2: Calculate forward price")
-    print(f"  F = (S - PV(Dividend)) × e^(r × T)")
-    print(f"  F = ({spot_price} - {pv_dividend:.4f}) × e^({risk_free_rate_maturity:.4f} × {maturity})")
-    print(f"  F = {spot_price - pv_dividend:.4f} × {math.exp(risk_free_rate_maturity * maturity):.6f}")
-    print(f"  F = €{forward_price:.4f}")
-    print()
+    if verbose:
+        print(f"Forward Price Calculation with Discrete Dividend")
+        print(f"=" * 60)
+        print(f"Spot Price (S): €{spot_price:.2f}")
+        print(f"Dividend: €{dividend:.2f} in {dividend_time*12:.1f} months")
+        print(f"Risk-free rate (5 months): {risk_free_rate_div*100:.2f}%")
+        print(f"Risk-free rate (1 year): {risk_free_rate_maturity*100:.2f}%")
+        print(f"Maturity: {maturity} year")
+        print()
+        print(f"Step 1: Calculate PV of dividend")
+        print(f"  PV(Dividend) = {dividend} × e^(-{risk_free_rate_div:.4f} × {dividend_time:.4f})")
+        print(f"  PV(Dividend) = €{pv_dividend:.4f}")
+        print()
+        print(f"Step 2: Calculate forward price")
+        print(f"  F = (S - PV(Dividend)) × e^(r × T)")
+        print(f"  F = ({spot_price} - {pv_dividend:.4f}) × e^({risk_free_rate_maturity:.4f} × {maturity})")
+        print(f"  F = {spot_price - pv_dividend:.4f} × {math.exp(risk_free_rate_maturity * maturity):.6f}")
+        print(f"  F = €{forward_price:.4f}")
+        print()
     
     return forward_price, pv_dividend
 
@@ -118,7 +120,8 @@ def main():
         dividend_time, 
         rate_5_months, 
         rate_1_year, 
-        maturity
+        maturity,
+        verbose=True
     )
     
     # Part (b): Calculate forward interest rate F(0, 5m, 1y)
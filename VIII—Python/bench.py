@@ -0,0 +1,365 @@
+"""
+Offline benchmark suite for the pricers, with stored baselines.
+
+Every case is timed best-of-n (asv style), reported as seconds per call,
+throughput in operations per second and peak traced memory. Each run also
+times a fixed calibration workload, and cases are compared by their time
+relative to it, so a baseline recorded on one machine remains meaningful on
+another. Results can be saved as a baseline and later runs compared against
+it; a case whose relative time got slower than the threshold, widened by the
+spread between repeats in both runs, makes the run fail with exit code 1.
+
+    python bench.py --save              # record bench_baseline.json
+    python bench.py                     # compare against it
+    python bench.py --filter mc --threshold 0.5
+
+bench_baseline.json is kept in the repository as a reference; absolute
+timings in it are only informative, the gate uses the relative ones.
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from functools import cache, partial
+
+import numpy as np
+
+from batch import bsm_batch
+from bond_analytics import bond_analytics
+from bonds import BondPortfolio
+from contracts import bsm_greeks, OptionContract, MarketState
+from ecl import expected_credit_loss
+from forward_book import ForwardBook
+from forward_pricing import forward_price
+from fourier import cos_price, fft_price
+from functions import VIII_Solvers
+from futures_margin import simulate_liquidity
+from implied_vol import implied_vol
+from monte_carlo import mc_european
+from pde import pde_price
+from value_at_risk import OptionBook, RiskEngine
+from yield_curve import YieldCurve
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FACT_CHECKING = os.path.join(HERE, "..", "Forrit", "AA-Extra", "Python fact checking")
+BASELINE_FILE = os.path.join(HERE, "bench_baseline.json")
+
+DEFAULT_THRESHOLD = 0.25
+REPEATS = 7
+MIN_RUN_SECONDS = 0.05
+BATCH_SIZE = 100000
+N_SCALAR = 1000
+N_QUOTES = 100
+CALIBRATION_SIZE = 100000
+HESTON_PARAMS = {"v0": 0.04, "kappa": 1.5, "theta": 0.05, "xi": 0.5, "rho": -0.7}
+
+
+@dataclass(frozen=True, slots=True)
+class Benchmark:
+    """
+    One timed case. func(data) is what gets timed; data comes from the
+    fixture, a cached builder of the inputs, so setup runs only for the
+    cases that are actually selected and is shared between them.
+    """
+    name: str
+    func: object
+    ops: int
+    fixture: object = None
+
+
+@cache
+def _load_script(filename, module_name):
+    """Import one of the fact-checking scripts, whose folder is not a package."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(FACT_CHECKING, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@cache
+def _calibration_data():
+    return np.random.default_rng(2).standard_normal(CALIBRATION_SIZE)
+
+
+def _calibration(data):
+    """Fixed mix of interpreter and NumPy work that every case is measured against."""
+    total = 0.0
+    for x in data[:2000].tolist():
+        total += math.exp(-0.5 * x * x)
+    return total + float(np.sort(data).sum()) + float(np.exp(data).sum())
+
+
+CALIBRATION = Benchmark("calibration", _calibration, CALIBRATION_SIZE, _calibration_data)
+
+
+def _chain(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "S0": rng.uniform(80, 120, n),
+        "K": rng.uniform(60, 140, n),
+        "T": rng.uniform(0.1, 2, n),
+        "r": np.full(n, 0.05),
+        "sigma": rng.uniform(0.1, 0.5, n),
+    }
+
+
+@cache
+def _options():
+    """Option chain, its prices and scalar versions of its first contracts."""
+    chain = _chain(BATCH_SIZE)
+    prices = bsm_batch(**chain)
+    columns = [[float(x) for x in chain[name][:N_SCALAR]] for name in ("S0", "K", "T", "r", "sigma")]
+    return {
+        "chain": chain,
+        "prices": prices,
+        "solvers": [VIII_Solvers(*state) for state in zip(*columns)],
+        "contracts": [OptionContract(K, T) for K, T in zip(columns[1], columns[2])],
+        "markets": [MarketState(S0, r, sigma) for S0, r, sigma in zip(columns[0], columns[3], columns[4])],
+        "quotes": [float(price) for price in prices["call"][:N_QUOTES]],
+    }
+
+
+@cache
+def _books():
+    """Bond book, curve, FX forward book and risk engine, all drawn from one generator."""
+    rng = np.random.default_rng(1)
+    book = BondPortfolio(face=1000, coupon_rate=rng.uniform(0.01, 0.07, BATCH_SIZE),
+                         maturity=rng.integers(1, 361, BATCH_SIZE) / 12, freq=2)
+    yields = rng.uniform(0.02, 0.06, BATCH_SIZE)
+    fixtures = {
+        "book": book,
+        "yields": yields,
+        "curve": YieldCurve([0.5, 1, 2, 5, 10, 30], [0.030, 0.032, 0.035, 0.038, 0.041, 0.043],
+                            interpolation="monotone-convex"),
+        "quotes": book.clean_price(yields),
+        "fx_book": ForwardBook(rng.uniform(-1e7, 1e7, BATCH_SIZE), rng.uniform(1.0, 1.2, BATCH_SIZE),
+                               rng.uniform(0.05, 2, BATCH_SIZE), rng.choice(["EURUSD", "GBPUSD"], BATCH_SIZE)),
+        "fx_grid": np.array([[1.08], [1.27]]) * np.linspace(0.8, 1.2, 101),
+        "t1": rng.uniform(0, 25, BATCH_SIZE),
+    }
+
+    n_assets = 5
+    history = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (500, n_assets)), axis=0))
+    option_assets = rng.integers(0, n_assets, 1000)
+    fixtures["engine"] = RiskEngine(history)
+    fixtures["option_book"] = OptionBook(option_assets, history[-1, option_assets] * rng.uniform(0.8, 1.2, 1000),
+                                         rng.uniform(0.1, 1, 1000), 0.25, rng.integers(-20, 21, 1000), 0.05)
+    fixtures["spots"] = _options()["chain"]["S0"][:1000]
+    return fixtures
+
+
+def _scalar_loop(method):
+    """Call a VIII_Solvers method once per contract, the way scalar code does."""
+    def run(data):
+        VIII_Solvers.clear_cache()
+        for solver in data["solvers"]:
+            method(solver)
+    return run
+
+
+def benchmarks():
+    """All registered benchmark cases; nothing is built until a case runs."""
+    cases = [
+        Benchmark("bsm_call.scalar", _scalar_loop(VIII_Solvers.BSM_call), N_SCALAR, _options),
+        Benchmark("bsm_put.scalar", _scalar_loop(VIII_Solvers.BSM_put), N_SCALAR, _options),
+        Benchmark("bsm.batch", lambda data: bsm_batch(**data["chain"]), BATCH_SIZE, _options),
+        Benchmark("greeks.scalar",
+                  lambda data: [bsm_greeks(c, m, "put") for c, m in zip(data["contracts"], data["markets"])],
+                  N_SCALAR, _options),
+        Benchmark("greeks.batch", lambda data: VIII_Solvers(**data["chain"]).greeks("put"), BATCH_SIZE, _options),
+        Benchmark("bsm_iv.scalar",
+                  lambda data: [solver.BSM_IV(price) for solver, price in zip(data["solvers"], data["quotes"])],
+                  N_QUOTES, _options),
+        Benchmark("bsm_iv.batch",
+                  lambda data: implied_vol(data["prices"]["call"], *(data["chain"][name] for name in
+                                                                    ("S0", "K", "T", "r"))),
+                  BATCH_SIZE, _options),
+    ]
+
+    for n_sim in (10 ** 4, 10 ** 5, 10 ** 6):
+        solver = VIII_Solvers(100, 105, 1, 0.05, 0.2, n_sim)
+        cases.append(Benchmark(f"mc_call.scalar.{n_sim}", lambda data, solver=solver: solver.mc_call(), n_sim))
+        cases.append(Benchmark(f"mc_put.scalar.{n_sim}", lambda data, solver=solver: solver.mc_put(), n_sim))
+        cases.append(Benchmark(f"mc_european.batch.{n_sim}",
+                               lambda data, n_sim=n_sim: mc_european(100, 105, 1, 0.05, 0.2, n_sim,
+                                                                     rng=np.random.default_rng(0)),
+                               n_sim))
+
+    def bonds():
+        return _load_script("test.py", "bond_pricing")
+
+    def forwards():
+        return _load_script("term_structure_forward_rates.py", "term_structure_forward_rates")
+
+    def dividend_forwards():
+        return _load_script("forward_dividend_stock.py", "forward_dividend_stock")
+
+    cases += [
+        Benchmark("bond_price_loop.scalar",
+                  lambda script: [script.calculate_bond_price(1000, 0.04375, 0.05, years)
+                                  for years in range(1, 31)], 30, bonds),
+        Benchmark("bond_price_formula.scalar",
+                  lambda script: [script.calculate_bond_price_formula(1000, 0.04375, 0.05, years)
+                                  for years in range(1, 31)], 30, bonds),
+        Benchmark("forward_rate.scalar",
+                  lambda script: [script.calculate_forward_rate(0.0014, t, 0.0063, t + 5) for t in range(1, 31)],
+                  30, forwards),
+        Benchmark("forward_dividend.scalar",
+                  lambda script: [script.calculate_forward_price_with_dividend(
+                      217.1, 9.5, 5 / 12, 0.006, 0.0085, t / 12, verbose=False) for t in range(6, 36)],
+                  30, dividend_forwards),
+    ]
+
+    cases += [
+        Benchmark("bond_price.batch", lambda data: data["book"].dirty_price(data["yields"]), BATCH_SIZE, _books),
+        Benchmark("bond_price_curve.batch", lambda data: data["book"].dirty_price(curve=data["curve"]),
+                  BATCH_SIZE, _books),
+        Benchmark("bond_ytm_risk.batch", lambda data: bond_analytics(data["book"], data["quotes"]),
+                  BATCH_SIZE, _books),
+        Benchmark("fx_hedge_pnl.batch",
+                  lambda data: data["fx_book"].hedge_pnl([1.08, 1.27], data["fx_grid"], [0.0, 0.25, 0.5], 0.05,
+                                                         [0.035, 0.045]),
+                  BATCH_SIZE, _books),
+        Benchmark("forward_dividend.batch",
+                  lambda data: forward_price(data["spots"], np.arange(1, 101) / 12, curve=data["curve"],
+                                             dividends=(np.arange(1, 41) / 4, np.full(40, 0.5))),
+                  1000 * 100, _books),
+        Benchmark("forward_rate.batch",
+                  lambda data: data["curve"].forward_rate(data["t1"], data["t1"] + 5, "annual"),
+                  BATCH_SIZE, _books),
+    ]
+
+    cases += [
+        Benchmark("american_put_pde.scalar",
+                  lambda data: pde_price(100, 105, 1, 0.05, 0.2, american=True), 400 * 200),
+        Benchmark("ecl_lifetime.batch",
+                  lambda data: expected_credit_loss(data["book"].face, data["yields"] / 10, 0.45,
+                                                    data["book"].maturity, data["book"].coupon_rate,
+                                                    curve=data["curve"]),
+                  BATCH_SIZE, _books),
+        Benchmark("futures_margin.mc",
+                  lambda data: simulate_liquidity(5000, 0.2, 252, -10, multiplier=50, initial_margin=25000,
+                                                  maintenance_margin=20000, n_paths=10000,
+                                                  rng=np.random.default_rng(0)), 10000 * 252),
+        Benchmark("heston_cos.batch",
+                  lambda data: cos_price("heston", 100, np.linspace(60, 160, 1001), 1, 0.05, HESTON_PARAMS),
+                  1001),
+        Benchmark("heston_fft.batch",
+                  lambda data: fft_price("heston", 100, np.linspace(60, 160, 1001), 1, 0.05, HESTON_PARAMS),
+                  1001),
+        Benchmark("var_historical_full.batch", lambda data: data["engine"].var_es(data["option_book"]),
+                  250 * 1000, _books),
+        Benchmark("var_mc_delta_gamma.batch",
+                  lambda data: data["engine"].var_es(data["option_book"], method="mc", mode="delta-gamma",
+                                                     n_sim=100000, rng=np.random.default_rng(0)),
+                  100000, _books),
+    ]
+    return cases
+
+
+def run_benchmark(case, repeats=REPEATS):
+    """
+    Best-of-n seconds per call, the spread median / best - 1 between the
+    repeats, and peak traced memory of one case.
+    """
+    func = partial(case.func, case.fixture() if case.fixture is not None else None)
+    func()
+
+    # Enough calls per sample that timer resolution does not matter
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_SECONDS:
+            break
+        number *= 2
+
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    best = min(samples)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": best, "spread": float(np.median(samples)) / best - 1,
+            "ops_per_second": case.ops / best, "peak_bytes": peak}
+
+
+def compare(results, baseline, threshold):
+    """
+    Names of cases whose time relative to the calibration case is more than
+    threshold plus the repeat spreads of both runs slower than the baseline.
+    Baseline entries without a relative time are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name, {})
+        if "relative" not in reference:
+            continue
+        allowed = threshold + result["spread"] + reference.get("spread", 0.0)
+        if result["relative"] > reference["relative"] * (1 + allowed):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pricers against a stored baseline.")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown before the run fails (default 0.25)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    calibration = run_benchmark(CALIBRATION)
+    print(f"Calibration {calibration['seconds'] * 1e3:.3f} ms per call")
+
+    results = {}
+    print(f"{'case':<32}{'time/call':>14}{'ops/s':>16}{'peak mem':>12}{'vs base':>10}")
+    for case in benchmarks():
+        if args.filter not in case.name:
+            continue
+        result = run_benchmark(case)
+        result["relative"] = result["seconds"] / calibration["seconds"]
+        results[case.name] = result
+        ratio = (f"{result['relative'] / baseline[case.name]['relative']:.2f}x"
+                 if "relative" in baseline.get(case.name, {}) else "-")
+        print(f"{case.name:<32}{result['seconds'] * 1e3:>11.3f} ms{result['ops_per_second']:>16,.0f}"
+              f"{result['peak_bytes'] / 2 ** 20:>9.2f} MB{ratio:>10}")
+
+    if args.save:
+        baseline.update(results)
+        baseline[CALIBRATION.name] = calibration
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%} plus repeat spread: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Cold-start import benchmark for the pricing module.
+
+Imports functions.py in fresh interpreters, takes the best of several runs
+and fails (exit code 1) if the import exceeds the time budget or pulls in
+any of the heavy optional dependencies, which must only load on demand.
+The probe then prices a small chain and solves its implied volatilities,
+since the closed-form path must not load them either.
+
+    python bench_import.py [budget_seconds]
+"""
+
+import os
+import subprocess
+import sys
+
+BUDGET_SECONDS = 0.25
+REPEATS = 5
+LAZY_MODULES = ("scipy", "matplotlib", "yfinance", "pandas")
+
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+import functions
+elapsed = time.perf_counter() - start
+solver = functions.VIII_Solvers(functions.np.array([90.0, 100.0, 110.0]), 105, 1, 0.05, 0.2)
+functions.implied_vol(solver.BSM_call(), solver.S0, solver.K, solver.T, solver.r)
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({LAZY_MODULES!r}))
+print(elapsed, ','.join(loaded))
+"""
+
+
+def measure_import(repeats=REPEATS):
+    """Best-of-n cold import time of functions.py and the lazy modules loaded by importing and pricing."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    loaded = set()
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", PROBE], cwd=here, check=True,
+                                capture_output=True, text=True).stdout.split()
+        timings.append(float(output[0]))
+        if len(output) > 1:
+            loaded.update(output[1].split(","))
+    return min(timings), sorted(loaded)
+
+
+if __name__ == "__main__":
+
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_SECONDS
+    elapsed, loaded = measure_import()
+
+    print(f"Cold import of functions.py: {elapsed * 1000:.1f} ms (budget {budget * 1000:.0f} ms)")
+    if loaded:
+        print(f"Optional dependencies loaded on the closed-form path: {', '.join(loaded)}")
+
+    if elapsed > budget or loaded:
+        print("FAILED")
+        sys.exit(1)
+    print("OK")
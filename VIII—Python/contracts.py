@@ -0,0 +1,195 @@
+"""
+Immutable option contract and market state types with pure pricing functions.
+
+Both types are frozen and slotted: they cannot be changed after creation,
+so any number of threads may price off the same objects, and they carry no
+per-instance __dict__, which keeps millions of positions cheap to hold.
+"""
+
+import math
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+
+@dataclass(frozen=True, slots=True)
+class OptionContract:
+    K: float
+    T: float
+
+
+@dataclass(frozen=True, slots=True)
+class MarketState:
+    S0: float
+    r: float
+    sigma: float
+    t: float = 0.0
+
+    def with_sigma(self, sigma):
+        """Return a copy of the market state with a different volatility."""
+        return replace(self, sigma=sigma)
+
+
+# Bounded so a long-running process pricing many distinct states keeps flat memory
+CACHE_SIZE = 4096
+
+_SQRT_2 = math.sqrt(2)
+_SQRT_2PI = math.sqrt(2 * math.pi)
+
+
+def norm_cdf(x):
+    """N(x) = erfc(-x/sqrt(2))/2"""
+    return 0.5 * math.erfc(-x / _SQRT_2)
+
+
+def norm_pdf(x):
+    """N'(x) = 1/sqrt(2*π) * exp(-x^2/2)"""
+    return math.exp(-(x ** 2) / 2) / _SQRT_2PI
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def bsm_intermediates(S0, K, T, r, sigma, t=0.0):
+    """
+    Shared building blocks of every closed-form price and Greek, memoized on
+    the full contract and market state:
+
+    (d1, d2, N(d1), N(d2), N(-d1), N(-d2), N'(d1), K*e^(-r(T-t)))
+
+    The key is the state itself, so changing any input simply misses the
+    cache; least recently used states are evicted beyond CACHE_SIZE entries.
+
+    At or past expiry (τ = T - t <= 0, taken as τ = 0) and for σ = 0 the
+    terminal price is known, and d1 = d2 take their limits: +∞ or -∞ by the
+    sign of ln(S0/(K e^(-rτ))), and 0 exactly at the money. Prices are then
+    the discounted intrinsic value.
+    """
+    tau = max(T - t, 0.0)
+    sig_sqrt_tau = sigma * math.sqrt(tau)
+    K_disc = K * math.exp(-r * tau)
+    if sig_sqrt_tau == 0:
+        moneyness = math.log(S0 / K_disc)
+        d_1 = d_2 = math.copysign(math.inf, moneyness) if moneyness else 0.0
+    else:
+        d_1 = (math.log(S0 / K) + (r + (sigma ** 2) / 2) * tau) / sig_sqrt_tau
+        d_2 = d_1 - sig_sqrt_tau
+    return (d_1, d_2, norm_cdf(d_1), norm_cdf(d_2), norm_cdf(-d_1), norm_cdf(-d_2),
+            norm_pdf(d_1), K_disc)
+
+
+def _intermediates(contract, market):
+    return bsm_intermediates(market.S0, contract.K, contract.T, market.r, market.sigma, market.t)
+
+
+def d1(contract, market):
+    return _intermediates(contract, market)[0]
+
+
+def d2(contract, market):
+    return _intermediates(contract, market)[1]
+
+
+def bsm_call(contract, market):
+    _, _, N_d1, N_d2, _, _, _, K_disc = _intermediates(contract, market)
+    return market.S0 * N_d1 - K_disc * N_d2
+
+
+def bsm_put(contract, market):
+    _, _, _, _, N_minus_d1, N_minus_d2, _, K_disc = _intermediates(contract, market)
+    return -market.S0 * N_minus_d1 + K_disc * N_minus_d2
+
+
+def bsm_greeks(contract, market, option="call"):
+    """
+    Price and every first/second order Greek of a call or put in one pass.
+
+    d1, d2, N(d1), N(d2), N'(d1) and the discount factor come from the
+    bsm_intermediates cache and are shared by all Greeks (τ = T - t):
+
+    Δ = N(d1) (call), N(d1) - 1 (put)
+    Γ = N'(d1)/(S σ sqrt(τ))
+    vega = S sqrt(τ) N'(d1)
+    Θ = -S N'(d1) σ/(2 sqrt(τ)) - r K e^(-rτ) N(d2) (call), + r K e^(-rτ) N(-d2) (put)
+    ρ = K τ e^(-rτ) N(d2) (call), -K τ e^(-rτ) N(-d2) (put)
+    vanna = -N'(d1) d2/σ
+    volga = vega d1 d2/σ
+    charm = -N'(d1) (2rτ - d2 σ sqrt(τ))/(2τ σ sqrt(τ))
+
+    At or past expiry and for σ = 0 the Greeks are the limits of these: the
+    value is the discounted intrinsic value, so gamma, vanna, volga and charm
+    are 0 away from the strike, and gamma is infinite at it (d1 = 0), where
+    vanna, volga and charm are undefined (NaN).
+    """
+    if option not in ("call", "put"):
+        raise ValueError("option must be 'call' or 'put'")
+
+    S0, sigma, r = market.S0, market.sigma, market.r
+    tau = max(contract.T - market.t, 0.0)
+    sqrt_tau = math.sqrt(tau)
+    sig_sqrt_tau = sigma * sqrt_tau
+    d_1, d_2, N_d1, N_d2, N_minus_d1, N_minus_d2, N_prime_d1, K_disc = _intermediates(contract, market)
+
+    vega = S0 * sqrt_tau * N_prime_d1
+    if sig_sqrt_tau == 0:
+        at_strike = d_1 == 0
+        undefined = math.nan if at_strike else 0.0
+        greeks = {
+            "d1": d_1,
+            "d2": d_2,
+            "gamma": math.inf if at_strike else 0.0,
+            "vega": vega,
+            "vanna": undefined,
+            "volga": undefined,
+            "charm": undefined,
+        }
+        theta_common = (-S0 * N_prime_d1 * sigma / (2 * sqrt_tau) if tau
+                        else -math.inf if at_strike and sigma else 0.0)
+    else:
+        greeks = {
+            "d1": d_1,
+            "d2": d_2,
+            "gamma": N_prime_d1 / (S0 * sig_sqrt_tau),
+            "vega": vega,
+            "vanna": -N_prime_d1 * d_2 / sigma,
+            "volga": vega * d_1 * d_2 / sigma,
+            "charm": -N_prime_d1 * (2 * r * tau - d_2 * sig_sqrt_tau) / (2 * tau * sig_sqrt_tau),
+        }
+        theta_common = -S0 * N_prime_d1 * sigma / (2 * sqrt_tau)
+
+    if option == "call":
+        greeks["price"] = S0 * N_d1 - K_disc * N_d2
+        greeks["delta"] = N_d1
+        greeks["theta"] = theta_common - r * K_disc * N_d2
+        greeks["rho"] = K_disc * tau * N_d2
+    else:
+        greeks["price"] = K_disc * N_minus_d2 - S0 * N_minus_d1
+        greeks["delta"] = -N_minus_d1
+        greeks["theta"] = theta_common + r * K_disc * N_minus_d2
+        greeks["rho"] = -K_disc * tau * N_minus_d2
+
+    return greeks
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    market = MarketState(S0=100, r=0.05, sigma=0.2)
+    book = [OptionContract(K=K, T=1) for K in range(80, 121)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        calls = list(pool.map(lambda contract: bsm_call(contract, market), book))
+
+    print(f"Priced {len(calls)} calls on a shared market state")
+    print(f"K = 105 call: {calls[25]:.4f}")
+
+    # On the expiry date, past it and with zero volatility the price is the discounted intrinsic value
+    expired = OptionContract(K=105, T=1)
+    for state in (MarketState(S0=100, r=0.05, sigma=0.2, t=1), MarketState(S0=100, r=0.05, sigma=0.2, t=1.5)):
+        assert bsm_call(expired, state) == 0.0 and bsm_put(expired, state) == 5.0
+        greeks = bsm_greeks(expired, state, "put")
+        assert greeks["delta"] == -1.0 and greeks["gamma"] == 0.0 and math.isclose(greeks["theta"], 0.05 * 105)
+    at_strike = bsm_greeks(OptionContract(K=100, T=1), MarketState(S0=100, r=0.05, sigma=0.2, t=1))
+    assert at_strike["price"] == 0.0 and at_strike["delta"] == 0.5 and at_strike["gamma"] == math.inf
+    flat = market.with_sigma(0.0)
+    assert math.isclose(bsm_call(OptionContract(K=105, T=1), flat), 100 - 105 * math.exp(-0.05))
+    assert bsm_put(OptionContract(K=105, T=1), flat) == 0.0
+    assert bsm_greeks(OptionContract(K=105, T=1), flat)["gamma"] == 0.0
+    print("Expiry-date and zero-volatility prices match intrinsic value")
@@ -0,0 +1,271 @@
+"""
+Expected credit loss (IFRS 9) for loan books held in columnar arrays.
+
+The single-exposure formula ECL = EAD × PD × LGD is applied per yearly
+bucket k of each loan's remaining term,
+
+    ECL = Σ_k (S(t_{k-1}) - S(t_k)) × LGD × EAD(t_{k-1}) × DF(t_k)
+
+with S the survival probability, EAD the amortizing balance at the start of
+the bucket and DF the discount factor at its end. The 12-month ECL is the
+first bucket, the lifetime ECL the whole sum. Loans are allocated to
+stages (1: 12-month, 2: lifetime, 3: credit-impaired) and totals are
+aggregated per segment with np.bincount. ecl_from_csv streams a loan file
+in fixed-size chunks so memory stays flat however large the book is.
+"""
+
+import csv
+from itertools import islice
+
+import numpy as np
+
+AMORTIZATIONS = ("annuity", "linear", "bullet")
+SICR_PD_MULTIPLE = 2.0
+STAGE2_DAYS_PAST_DUE = 30
+STAGE3_DAYS_PAST_DUE = 90
+TOTAL_FIELDS = ("count", "ead", "ecl_12m", "ecl_lifetime", "ecl", "stage1", "stage2", "stage3")
+
+
+def allocate_stage(pd_12m, origination_pd, days_past_due):
+    """
+    Stage 3 at 90+ days past due; stage 2 at 30+ days past due or when the
+    12-month PD has grown beyond SICR_PD_MULTIPLE times its origination
+    level (significant increase in credit risk); stage 1 otherwise.
+    """
+    pd_12m, origination_pd, days_past_due = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (pd_12m, origination_pd, days_past_due)))
+    # Strictly beyond, so a PD that is still zero is no increase
+    significant_increase = (days_past_due >= STAGE2_DAYS_PAST_DUE) | (pd_12m > SICR_PD_MULTIPLE * origination_pd)
+    return np.where(days_past_due >= STAGE3_DAYS_PAST_DUE, 3, np.where(significant_increase, 2, 1))
+
+
+def _log_survival(t, pd_12m, pd_curve=None, grade=None):
+    """
+    ln S(t) for a (n_loans, n_times) array of times.
+
+    Without a term structure the hazard is flat, S(t) = (1 - PD_12m)^t.
+    pd_curve holds cumulative PDs at years 1..Y per grade; ln S is linear
+    within each year and extrapolated with the last year's hazard.
+    """
+    if pd_curve is None:
+        return t * np.log1p(-pd_12m)[:, None]
+
+    pd_curve = np.asarray(pd_curve, dtype=float)
+    log_s = np.log1p(-np.concatenate((np.zeros((pd_curve.shape[0], 1)), pd_curve), axis=1))
+    years = log_s.shape[1] - 1
+    last_hazard = log_s[:, -1] - log_s[:, -2]
+    log_s = log_s[grade]
+
+    j = np.minimum(np.floor(t).astype(np.intp), years - 1)
+    rows = np.arange(t.shape[0])[:, None]
+    start = log_s[rows, j]
+    slope = log_s[rows, j + 1] - start
+    within = np.minimum(t - j, 1.0)
+    beyond = np.maximum(t - years, 0)
+    return start + slope * within + last_hazard[grade][:, None] * beyond
+
+
+def _balance(ead, term, rate, amortization, t):
+    """
+    Outstanding balance at time t, shape (n_loans, n_times). A loan with no
+    remaining term has a zero profile.
+    """
+    n = term[:, None]
+    i = rate[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        linear = np.clip(1 - t / n, 0, 1)
+        growth_n = (1 + i) ** n
+        annuity = np.where(i > 0, (growth_n - (1 + i) ** t) / (growth_n - 1), linear)
+    annuity = np.clip(annuity, 0, 1)
+    bullet = (t < n).astype(float)
+    profile = np.select([amortization[:, None] == "annuity", amortization[:, None] == "linear"],
+                        [annuity, linear], bullet)
+    return ead[:, None] * np.where(n > 0, profile, 0.0)
+
+
+def expected_credit_loss(ead, pd_12m, lgd, term, rate=0.0, amortization="annuity", stage=None,
+                         origination_pd=None, days_past_due=0, curve=None, pd_curve=None, grade=None):
+    """
+    12-month, lifetime and staged ECL for arrays of loans.
+
+    ead: current exposure; pd_12m, lgd: decimals; term: remaining years
+    rate: contractual annual rate, used for annuity amortization and, when no
+        curve is given, as the effective interest rate for discounting
+    amortization: "annuity", "linear" or "bullet", per loan or for all
+    stage: given stages, or None to allocate them from origination_pd and days_past_due
+    curve: discount curve with a discount(t) method (yield_curve.YieldCurve)
+    pd_curve, grade: optional cumulative PD term structure (n_grades, n_years)
+        and each loan's grade, replacing the flat hazard implied by pd_12m
+
+    Returns a dictionary of arrays: ecl_12m, ecl_lifetime, stage and ecl.
+    """
+    ead, pd_12m, lgd, term, rate = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (ead, pd_12m, lgd, term, rate)))
+    amortization = np.broadcast_to(np.asarray(amortization), ead.shape)
+    unknown = set(np.unique(amortization)) - set(AMORTIZATIONS)
+    if unknown:
+        raise ValueError(f"amortization must be one of {', '.join(AMORTIZATIONS)}")
+    if pd_curve is not None:
+        if grade is None:
+            raise ValueError("grade is required when pd_curve is given")
+        grade = np.broadcast_to(np.asarray(grade, dtype=np.intp), ead.shape)
+
+    if stage is None:
+        stage = allocate_stage(pd_12m, pd_12m if origination_pd is None else origination_pd, days_past_due)
+    stage = np.broadcast_to(np.asarray(stage), ead.shape)
+
+    # Yearly buckets [t_{k-1}, t_k] with t_k = min(k, term)
+    n_buckets = max(int(np.ceil(term.max() - 1e-9)), 1)
+    k = np.arange(n_buckets + 1)
+    t = np.minimum(k[None, :], term[:, None])
+
+    survival = np.exp(_log_survival(t, pd_12m, pd_curve, grade))
+    marginal_pd = survival[:, :-1] - survival[:, 1:]
+    exposure = _balance(ead, term, rate, amortization, t[:, :-1])
+    end = t[:, 1:]
+    discount = curve.discount(end) if curve is not None else (1 + rate[:, None]) ** -end
+
+    losses = marginal_pd * lgd[:, None] * exposure * discount
+    ecl_12m = losses[:, 0]
+    ecl_lifetime = losses.sum(axis=1)
+    ecl = np.select([stage == 1, stage == 2], [ecl_12m, ecl_lifetime], lgd * ead)
+    return {"ecl_12m": ecl_12m, "ecl_lifetime": ecl_lifetime, "stage": stage, "ecl": ecl}
+
+
+def aggregate_by_segment(segment, ead, result, labels=None):
+    """
+    Totals per segment: count, EAD, 12-month, lifetime and staged ECL, and
+    the number of loans in each stage. Returns (labels, totals).
+    """
+    if labels is None:
+        labels, codes = np.unique(segment, return_inverse=True)
+    else:
+        codes = np.searchsorted(labels, segment)
+    n = len(labels)
+    stage = result["stage"]
+    totals = {
+        "count": np.bincount(codes, minlength=n).astype(float),
+        "ead": np.bincount(codes, weights=ead, minlength=n),
+        "ecl_12m": np.bincount(codes, weights=result["ecl_12m"], minlength=n),
+        "ecl_lifetime": np.bincount(codes, weights=result["ecl_lifetime"], minlength=n),
+        "ecl": np.bincount(codes, weights=result["ecl"], minlength=n),
+    }
+    for s in (1, 2, 3):
+        totals[f"stage{s}"] = np.bincount(codes, weights=(stage == s).astype(float), minlength=n)
+    return labels, totals
+
+
+def ecl_from_csv(path, chunk_rows=100000, curve=None, pd_curve=None):
+    """
+    Stream a loan file and aggregate ECL per segment in chunks of chunk_rows loans.
+
+    The CSV needs a header with columns ead, pd_12m, lgd, term and segment;
+    rate, amortization, origination_pd, days_past_due, stage and grade are
+    optional. Only one chunk is held in memory at a time.
+    Returns (labels, totals) as from aggregate_by_segment.
+    """
+    labels = np.empty(0, dtype=str)
+    totals = {name: np.zeros(0) for name in TOTAL_FIELDS}
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        missing = {"ead", "pd_12m", "lgd", "term", "segment"} - set(header)
+        if missing:
+            raise KeyError(f"Loan file is missing columns: {', '.join(sorted(missing))}")
+        if pd_curve is not None and "grade" not in header:
+            raise KeyError("Loan file needs a grade column when pd_curve is given")
+
+        while True:
+            rows = list(islice(reader, chunk_rows))
+            if not rows:
+                break
+            columns = dict(zip(header, zip(*rows)))
+
+            def numeric(name, default=None):
+                return np.array(columns[name], dtype=float) if name in columns else default
+
+            result = expected_credit_loss(
+                numeric("ead"), numeric("pd_12m"), numeric("lgd"), numeric("term"),
+                rate=numeric("rate", 0.0),
+                amortization=np.array(columns.get("amortization", "annuity")),
+                stage=numeric("stage"),
+                origination_pd=numeric("origination_pd"),
+                days_past_due=numeric("days_past_due", 0),
+                curve=curve, pd_curve=pd_curve,
+                grade=numeric("grade"))
+            segment = np.array(columns["segment"])
+
+            # Grow the label set when a chunk brings new segments
+            new = np.setdiff1d(segment, labels)
+            if new.size:
+                merged = np.union1d(labels, new)
+                position = np.searchsorted(merged, labels)
+                for name in TOTAL_FIELDS:
+                    grown = np.zeros(merged.size)
+                    grown[position] = totals[name]
+                    totals[name] = grown
+                labels = merged
+
+            _, chunk_totals = aggregate_by_segment(segment, numeric("ead"), result, labels)
+            for name in TOTAL_FIELDS:
+                totals[name] += chunk_totals[name]
+
+    return labels, totals
+
+
+if __name__ == "__main__":
+
+    import os
+    import tempfile
+
+    # The Danske Bank example from the calculator: EAD 8bn, PD 2.3%, LGD 60%
+    danske = expected_credit_loss(8e9, 0.023, 0.60, term=1, rate=0.0, amortization="bullet", stage=1)
+    print(f"Danske 12-month ECL: {float(danske['ecl'][0]):,.0f}")
+
+    # Zero-PD exposures (e.g. sovereign) stay in stage 1, with or without an origination PD
+    assert (allocate_stage([0.0, 0.0, 0.01], [0.0, 0.0, 0.0], [0, 45, 0]) == [1, 2, 2]).all()
+    assert expected_credit_loss([1e6, 1e6], [0.0, 0.01], 0.45, term=5)["stage"].tolist() == [1, 1]
+
+    # Matured loans (term 0) carry no balance and no loss, and must not poison segment totals
+    for amortization in AMORTIZATIONS:
+        matured = expected_credit_loss([1e6, 1e6], 0.02, 0.45, term=[0, 5], rate=0.05, amortization=amortization)
+        assert np.isfinite(matured["ecl"]).all() and matured["ecl"][0] == 0, amortization
+
+    rng = np.random.default_rng(0)
+    n_loans = 300000
+    segments = np.array(["corporate", "mortgage", "consumer", "sme"])
+    book = {
+        "ead": rng.lognormal(11, 1, n_loans),
+        "pd_12m": rng.beta(1, 60, n_loans),
+        "lgd": rng.uniform(0.1, 0.6, n_loans),
+        "term": rng.uniform(0.25, 30, n_loans).round(2),
+        "rate": rng.uniform(0.02, 0.09, n_loans),
+        "amortization": rng.choice(AMORTIZATIONS, n_loans),
+        "origination_pd": rng.beta(1, 80, n_loans),
+        "days_past_due": rng.choice([0, 0, 0, 0, 15, 45, 120], n_loans),
+        "segment": rng.choice(segments, n_loans),
+    }
+
+    from yield_curve import YieldCurve
+
+    curve = YieldCurve([0.5, 1, 2, 5, 10, 30], [0.030, 0.032, 0.035, 0.038, 0.041, 0.043])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "loans.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(book.keys())
+            writer.writerows(zip(*book.values()))
+
+        labels, totals = ecl_from_csv(path, chunk_rows=50000, curve=curve)
+        try:
+            ecl_from_csv(path, pd_curve=[[0.01, 0.02, 0.03]])
+        except KeyError as error:
+            print(f"Rejected: {error}")
+        else:
+            raise AssertionError("ecl_from_csv accepted pd_curve without a grade column")
+
+    print(f"{'segment':<12}{'loans':>9}{'EAD':>18}{'ECL':>16}{'stage 2':>9}{'stage 3':>9}")
+    for i, label in enumerate(labels):
+        print(f"{label:<12}{totals['count'][i]:>9,.0f}{totals['ead'][i]:>18,.0f}{totals['ecl'][i]:>16,.0f}"
+              f"{totals['stage2'][i]:>9,.0f}{totals['stage3'][i]:>9,.0f}")
@@ -0,0 +1,176 @@
+"""
+Mark-to-market and hedge P&L for a book of FX forwards.
+
+Positions are held in columnar arrays. A long forward on N units of the base
+currency at strike K (quote currency per base unit), with τ = T - t left,
+is worth
+
+    V = N (S e^(-r_f τ) - K e^(-r_d τ))
+
+in the quote currency. V is linear in the spot, so the book of one currency
+pair at time t is worth A(t) S - B(t), with
+
+    A(t) = Σ N e^(-r_f τ),   B(t) = Σ N K e^(-r_d τ)
+
+A and B are aggregated per pair with np.bincount, and a whole spot × time
+scenario grid costs O(n_positions n_times + n_pairs n_spots n_times).
+
+A position is worth its payoff N (S - K) at maturity. Afterwards it has
+settled and left the book, so at later times it is worth zero and drops out
+of A and B; the settlement cash is not tracked.
+"""
+
+import numpy as np
+
+
+class ForwardBook:
+    """
+    FX forward positions.
+
+    notional: base-currency amount, positive to buy (long) and negative to sell
+    strike: agreed forward rate, quote currency per base unit
+    maturity: delivery time in years
+    pair: currency pair label of each position, e.g. "EURUSD"
+
+    Market data (spots, domestic and foreign rates) is passed to each method
+    either as a dictionary keyed by pair or as an array aligned with self.pairs.
+    Rates are continuously compounded; the domestic rate is the quote
+    currency's and the foreign rate the base currency's.
+    """
+
+    def __init__(self, notional, strike, maturity, pair):
+        notional, strike, maturity = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (notional, strike, maturity)))
+        self.notional = notional
+        self.strike = strike
+        self.maturity = maturity
+        self.pairs, self.pair_index = np.unique(np.broadcast_to(np.asarray(pair), notional.shape),
+                                                return_inverse=True)
+        self.pair_index = self.pair_index.reshape(notional.shape)
+
+    def __len__(self):
+        return self.notional.size
+
+    def _per_pair(self, values):
+        """Market data as a float array aligned with self.pairs."""
+        if isinstance(values, dict):
+            missing = set(self.pairs) - set(values)
+            if missing:
+                raise ValueError(f"Missing market data for {', '.join(sorted(missing))}")
+            values = [values[p] for p in self.pairs]
+        return np.broadcast_to(np.asarray(values, dtype=float), self.pairs.shape)
+
+    def by_position(self, values):
+        """
+        Market data given per pair (a dictionary keyed by pair or an array
+        aligned with self.pairs) as a float array with one entry per position.
+        """
+        return self._per_pair(values)[self.pair_index]
+
+    def _time_left(self, t):
+        """
+        τ = T - t for each position (rows) and time (columns), clamped at 0,
+        and whether the position is still in the book (t <= T).
+        """
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        tau = self.maturity[:, None] - t[None, :]
+        return np.maximum(tau, 0), tau >= 0
+
+    def _aggregate(self, *weights):
+        """Sum (n_positions, n_times) weights per pair and time, one bincount per weight array."""
+        n_pairs, n_times = self.pairs.size, weights[0].shape[1]
+        cells = (self.pair_index[:, None] * n_times + np.arange(n_times)).ravel()
+        return tuple(np.bincount(cells, weights=w.ravel(), minlength=n_pairs * n_times).reshape(n_pairs, n_times)
+                     for w in weights)
+
+    def mtm(self, spot, domestic_rate, foreign_rate, t=0.0):
+        """
+        Discounted value of every position at time t, in its quote currency.
+        A position is worth its payoff N (S - K) at maturity and zero after it.
+        """
+        tau, alive = (x[:, 0] for x in self._time_left(t))
+        S, rd, rf = (self.by_position(x) for x in (spot, domestic_rate, foreign_rate))
+        return np.where(alive, self.notional * (S * np.exp(-rf * tau) - self.strike * np.exp(-rd * tau)), 0.0)
+
+    def exposures(self, times, domestic_rate, foreign_rate):
+        """
+        Per-pair coefficients (A, B) of the book value A S - B, each of shape
+        (n_pairs, n_times). Positions past maturity contribute nothing.
+        """
+        return self._aggregate(*self._weights(times, domestic_rate, foreign_rate))
+
+    def _weights(self, times, domestic_rate, foreign_rate, today=None):
+        """
+        Per-position terms N e^(-r_f τ) and N K e^(-r_d τ) of A and B, zero
+        past maturity, plus today's values masked the same way if given.
+        """
+        tau, alive = self._time_left(times)
+        rd, rf = (self.by_position(x)[:, None] for x in (domestic_rate, foreign_rate))
+        live = np.where(alive, self.notional[:, None], 0.0)
+        base = live * np.exp(-rf * tau)
+        quote = live * self.strike[:, None]
+        quote *= np.exp(-rd * tau)
+        if today is None:
+            return base, quote
+        return base, quote, alive * today[:, None]
+
+    def scenario_mtm(self, spot_grid, times, domestic_rate, foreign_rate):
+        """
+        Book value per pair over a spot × time grid.
+
+        spot_grid: (n_pairs, n_spots) scenario spots per pair, aligned with self.pairs
+        times: (n_times,) valuation times in years
+        Returns an (n_pairs, n_spots, n_times) array.
+        """
+        A, B = self.exposures(times, domestic_rate, foreign_rate)
+        return self._grid_value(spot_grid, A, B)
+
+    def _grid_value(self, spot_grid, A, B):
+        spot_grid = np.asarray(spot_grid, dtype=float).reshape(self.pairs.size, -1)
+        return spot_grid[:, :, None] * A[:, None, :] - B[:, None, :]
+
+    def hedge_pnl(self, spot, spot_grid, times, domestic_rate, foreign_rate):
+        """
+        Gain (positive) or loss of the forward hedges per pair over the grid,
+        relative to today's value at the current spots: scenario_mtm minus
+        the t = 0 value of the positions still in the book at each time, so
+        that a settled position is not counted as a loss of its value.
+        """
+        A, B, today = self._aggregate(*self._weights(times, domestic_rate, foreign_rate,
+                                                     self.mtm(spot, domestic_rate, foreign_rate)))
+        return self._grid_value(spot_grid, A, B) - today[:, None, :]
+
+
+if __name__ == "__main__":
+
+    # Problem Q7: buy EUR 6.4m forward at 1.22 USD/EUR, settled at spot 1.195 or 1.226
+    hedge = ForwardBook(6.4, 1.22, 1.0, "EURUSD")
+    at_expiry = hedge.scenario_mtm([[1.195, 1.226]], [1.0], 0.0, 0.0)[0, :, 0]
+    print(f"Payoff at spot 1.195: ${at_expiry[0]:.3f}m, at spot 1.226: ${at_expiry[1]:.3f}m")
+    print(f"Fair value at 1.226 six months before expiry (r_USD 5%, r_EUR 3%): "
+          f"${float(hedge.mtm(1.226, 0.05, 0.03, t=0.5)[0]):.4f}m")
+
+    # Past its maturity the position has settled: worth zero, and out of the hedge P&L
+    assert float(hedge.mtm(1.226, 0.05, 0.03, t=1.5)[0]) == 0.0
+    assert (hedge.scenario_mtm([[1.195, 1.226]], [1.5], 0.05, 0.03) == 0).all()
+    assert (hedge.hedge_pnl(1.2, [[1.195, 1.226]], [1.5], 0.05, 0.03) == 0).all()
+
+    rng = np.random.default_rng(0)
+    n_positions = 100000
+    # Market data arrays follow book.pairs, which is sorted
+    pairs = np.array(["AUDUSD", "EURUSD", "GBPUSD", "USDCHF", "USDJPY"])
+    spot = np.array([0.66, 1.08, 1.27, 0.90, 151.0])
+    domestic = np.array([0.05, 0.05, 0.05, 0.015, 0.001])
+    foreign = np.array([0.04, 0.035, 0.045, 0.05, 0.05])
+    pair = rng.integers(0, pairs.size, n_positions)
+    book = ForwardBook(notional=rng.uniform(-10, 10, n_positions) * 1e6,
+                       strike=spot[pair] * rng.uniform(0.95, 1.05, n_positions),
+                       maturity=rng.uniform(0.05, 2, n_positions), pair=pairs[pair])
+
+    market_spot = dict(zip(pairs, spot))
+    shocks = np.linspace(0.8, 1.2, 101)
+    times = np.linspace(0, 2, 25)
+    pnl = book.hedge_pnl(market_spot, spot[:, None] * shocks, times, domestic, foreign)
+    print(f"Hedge P&L for {len(book)} forwards on a {shocks.size} x {times.size} grid, shape {pnl.shape}")
+    for p, worst in zip(book.pairs, pnl.min(axis=(1, 2))):
+        print(f"  {p}: worst scenario {worst:,.0f}")
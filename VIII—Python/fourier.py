@@ -0,0 +1,288 @@
+"""
+Characteristic-function pricing of European options on whole strike ladders.
+
+Models give the characteristic function of the log-return x = ln(S_T/S0)
+under the risk-neutral measure, φ(u) = E[e^(iux)]:
+
+    bs      Black-Scholes              sigma
+    heston  Heston stochastic vol      v0, kappa, theta, xi, rho
+    merton  Merton jump-diffusion      sigma, lam, mu_j, delta_j
+    vg      Variance Gamma             sigma, theta, nu
+
+Two pricers use it. Carr-Madan FFT prices a whole log-strike grid with one
+FFT of N points, O(N log N), and interpolates to the requested strikes with
+a cubic. COS expands the payoff in a cosine series on a truncated range
+[a, b]. The frequencies, phase factors and discounted payoff coefficients
+depend only on the strikes and expiries, so COSGrid computes them once.
+Each calibration step then only evaluates φ at N frequencies per expiry
+and takes one matrix-vector product.
+"""
+
+import numpy as np
+
+MODELS = {
+    "bs": ("sigma",),
+    "heston": ("v0", "kappa", "theta", "xi", "rho"),
+    "merton": ("sigma", "lam", "mu_j", "delta_j"),
+    "vg": ("sigma", "theta", "nu"),
+}
+COS_TERMS = 256
+COS_WIDTH = 12
+FFT_POINTS = 2 ** 12
+FFT_ETA = 0.25
+FFT_ALPHA = 1.5
+
+
+def _bs_cf(u, T, r, sigma):
+    """φ(u) = exp(iu(r - σ^2/2)T - σ^2 u^2 T/2)"""
+    return np.exp(1j * u * (r - sigma ** 2 / 2) * T - sigma ** 2 * u ** 2 * T / 2)
+
+
+def _heston_cf(u, T, r, v0, kappa, theta, xi, rho):
+    """
+    Heston in the "little trap" form of Albrecher et al., continuous in u:
+
+    d = sqrt((ρξiu - κ)^2 + ξ^2(iu + u^2)),   g = (κ - ρξiu - d)/(κ - ρξiu + d)
+    φ(u) = exp(iurT + κθ/ξ^2 ((κ - ρξiu - d)T - 2 ln((1 - g e^(-dT))/(1 - g)))
+               + v0/ξ^2 (κ - ρξiu - d)(1 - e^(-dT))/(1 - g e^(-dT)))
+    """
+    beta = kappa - rho * xi * 1j * u
+    d = np.sqrt(beta ** 2 + xi ** 2 * (1j * u + u ** 2))
+    g = (beta - d) / (beta + d)
+    decay = np.exp(-d * T)
+    C = kappa * theta / xi ** 2 * ((beta - d) * T - 2 * np.log((1 - g * decay) / (1 - g)))
+    D = (beta - d) / xi ** 2 * (1 - decay) / (1 - g * decay)
+    return np.exp(1j * u * r * T + C + D * v0)
+
+
+def _merton_cf(u, T, r, sigma, lam, mu_j, delta_j):
+    """
+    Lognormal jumps at rate λ, ln(1 + J) ~ N(μ_J, δ_J^2), compensated so that S is a martingale:
+
+    φ(u) = exp(iuωT - σ^2 u^2 T/2 + λT(e^(iuμ_J - δ_J^2 u^2/2) - 1)),   ω = r - σ^2/2 - λ(e^(μ_J + δ_J^2/2) - 1)
+    """
+    omega = r - sigma ** 2 / 2 - lam * (np.exp(mu_j + delta_j ** 2 / 2) - 1)
+    jumps = lam * T * (np.exp(1j * u * mu_j - delta_j ** 2 * u ** 2 / 2) - 1)
+    return np.exp(1j * u * omega * T - sigma ** 2 * u ** 2 * T / 2 + jumps)
+
+
+def _vg_cf(u, T, r, sigma, theta, nu):
+    """
+    φ(u) = e^(iu(r + ω)T) (1 - iuθν + σ^2 ν u^2/2)^(-T/ν),   ω = ln(1 - θν - σ^2 ν/2)/ν
+    """
+    omega = np.log(1 - theta * nu - sigma ** 2 * nu / 2) / nu
+    return np.exp(1j * u * (r + omega) * T) * (1 - 1j * u * theta * nu + sigma ** 2 * nu * u ** 2 / 2) ** (-T / nu)
+
+
+_CHARACTERISTIC_FUNCTIONS = {"bs": _bs_cf, "heston": _heston_cf, "merton": _merton_cf, "vg": _vg_cf}
+
+
+def _model_params(model, params):
+    """Parameter tuple in the model's order from a dictionary or a sequence."""
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {', '.join(MODELS)}")
+    if isinstance(params, dict):
+        missing = [name for name in MODELS[model] if name not in params]
+        if missing:
+            raise ValueError(f"Missing {model} parameters: {', '.join(missing)}")
+        return tuple(float(params[name]) for name in MODELS[model])
+    return tuple(float(p) for p in params)
+
+
+def characteristic_function(model, u, T, r, params):
+    """φ(u) of ln(S_T/S0) for the given model and parameters (dictionary or sequence)."""
+    return _CHARACTERISTIC_FUNCTIONS[model](np.asarray(u), T, r, *_model_params(model, params))
+
+
+def _cumulants(cf, T, r, params, h=1e-3):
+    """First two cumulants of ln(S_T/S0) from ln φ near u = 0, for the COS truncation range."""
+    log_phi = np.log(cf(np.array([h, -h]), T, r, *params))
+    c1 = (log_phi[0].imag - log_phi[1].imag) / (2 * h)
+    c2 = -(log_phi[0].real + log_phi[1].real) / h ** 2
+    return c1, max(c2, 1e-12)
+
+
+def _cos_put_coefficients(a, b, log_moneyness, n_terms):
+    """
+    Cosine coefficients V_k of the put payoff (e^κ - e^x)^+ per unit S0, κ = ln(K/S0), on [a, b].
+    Shape (n_terms, n_strikes); the first term carries the 1/2 weight of the COS sum.
+    """
+    kappa = np.clip(log_moneyness, a, b)[None, :]
+    w = (np.arange(n_terms) * np.pi / (b - a))[:, None]
+    cos_d, sin_d = np.cos(w * (kappa - a)), np.sin(w * (kappa - a))
+    # χ_k(a, κ) = ∫_a^κ e^x cos(w(x - a)) dx
+    chi = (cos_d * np.exp(kappa) - np.exp(a) + w * sin_d * np.exp(kappa)) / (1 + w ** 2)
+    # ψ_k(a, κ) = ∫_a^κ cos(w(x - a)) dx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        psi = np.where(w > 0, sin_d / w, kappa - a)
+    V = 2 / (b - a) * (np.exp(kappa) * psi - chi)
+    V[0] /= 2
+    return V
+
+
+class COSGrid:
+    """
+    COS pricer for fixed strike ladders at several expiries, with everything
+    that does not depend on the model parameters precomputed.
+
+    S0, r: spot and flat rate
+    K, T: strikes and expiries of the quotes (same length)
+    model, params: the truncation range [a, b] = c1 ± COS_WIDTH sqrt(c2) per
+        expiry is set from these parameters' cumulants and kept fixed, so
+        pass a reasonable starting point when calibrating
+    """
+
+    def __init__(self, S0, r, K, T, model, params, n_terms=COS_TERMS, width=COS_WIDTH):
+        K, T = np.broadcast_arrays(np.atleast_1d(np.asarray(K, dtype=float)),
+                                   np.atleast_1d(np.asarray(T, dtype=float)))
+        self.S0 = S0
+        self.r = r
+        self.K = K
+        self.T = T
+        self.model = model
+        self.expiries = np.unique(T)
+        self._cf = _CHARACTERISTIC_FUNCTIONS[model]
+
+        start = _model_params(model, params)
+        self._slices = []
+        for expiry in self.expiries:
+            rows = np.nonzero(T == expiry)[0]
+            c1, c2 = _cumulants(self._cf, expiry, r, start)
+            half_width = width * np.sqrt(c2)
+            a, b = c1 - half_width, c1 + half_width
+            u = np.arange(n_terms) * np.pi / (b - a)
+            V = _cos_put_coefficients(a, b, np.log(K[rows] / S0), n_terms) * S0 * np.exp(-r * expiry)
+            self._slices.append((rows, expiry, u, np.exp(-1j * u * a), V))
+
+    def prices(self, params, option="call"):
+        """Prices of every quote, in input order."""
+        params = _model_params(self.model, params)
+        puts = np.empty(self.K.size)
+        for rows, expiry, u, phase, V in self._slices:
+            phi = self._cf(u, expiry, self.r, *params) * phase
+            puts[rows] = phi.real @ V
+        if option == "put":
+            return puts
+        return puts + self.S0 - self.K * np.exp(-self.r * self.T)
+
+
+def cos_price(model, S0, K, T, r, params, option="call", n_terms=COS_TERMS, width=COS_WIDTH):
+    """European prices for a strike ladder (and expiries) by the COS method."""
+    return COSGrid(S0, r, K, T, model, params, n_terms, width).prices(params, option)
+
+
+def _cubic_interp(x, start, spacing, values):
+    """
+    Four-point Lagrange interpolation on the uniform grid start + spacing*j.
+    With s the position of x between nodes i and i+1:
+
+    f(x) ≈ -s(s-1)(s-2)/6 f_(i-1) + (s+1)(s-1)(s-2)/2 f_i - (s+1)s(s-2)/2 f_(i+1) + (s+1)s(s-1)/6 f_(i+2)
+
+    The error is O(λ^4), against O(λ^2) for linear interpolation.
+    """
+    position = (x - start) / spacing
+    i = np.clip(np.floor(position).astype(np.intp), 1, values.size - 3)
+    s = position - i
+    return (-s * (s - 1) * (s - 2) / 6 * values[i - 1] + (s + 1) * (s - 1) * (s - 2) / 2 * values[i]
+            - (s + 1) * s * (s - 2) / 2 * values[i + 1] + (s + 1) * s * (s - 1) / 6 * values[i + 2])
+
+
+def fft_price(model, S0, K, T, r, params, option="call", n_points=FFT_POINTS, eta=FFT_ETA, alpha=FFT_ALPHA):
+    """
+    Carr-Madan FFT prices for strikes K at a single expiry T.
+
+    C(k) = e^(-αk)/π Re ∫_0^∞ e^(-ivk) ψ(v) dv,
+    ψ(v) = e^(-rT) φ_lnS(v - (α + 1)i) / (α^2 + α - v^2 + i(2α + 1)v)
+
+    evaluated on a log-strike grid of spacing λ = 2π/(Nη) with one FFT and
+    Simpson weights, then interpolated to ln K with a four-point cubic.
+    """
+    params = _model_params(model, params)
+    cf = _CHARACTERISTIC_FUNCTIONS[model]
+    K = np.atleast_1d(np.asarray(K, dtype=float))
+
+    j = np.arange(n_points)
+    v = eta * j
+    spacing = 2 * np.pi / (n_points * eta)
+    lower = np.log(S0) - n_points * spacing / 2
+    u = v - (alpha + 1) * 1j
+    # φ of ln S_T is φ of ln(S_T/S0) shifted by ln S0
+    phi = np.exp(1j * u * np.log(S0)) * cf(u, T, r, *params)
+    psi = np.exp(-r * T) * phi / (alpha ** 2 + alpha - v ** 2 + 1j * (2 * alpha + 1) * v)
+
+    simpson = (3 + (-1) ** (j + 1)) / 3
+    simpson[0] = 1 / 3
+    transformed = np.fft.fft(np.exp(-1j * lower * v) * psi * eta * simpson)
+    log_strikes = lower + spacing * j
+    calls = np.exp(-alpha * log_strikes) / np.pi * transformed.real
+
+    price = _cubic_interp(np.log(K), lower, spacing, calls)
+    if option == "put":
+        return price - S0 + K * np.exp(-r * T)
+    return price
+
+
+def calibrate(model, S0, r, K, T, prices, start, bounds=None, option="call", n_terms=COS_TERMS):
+    """
+    Least-squares fit of a model to option quotes through COSGrid.
+
+    start: starting parameters (dictionary or sequence in MODELS order)
+    bounds: (lower, upper) sequences in the same order
+    Returns a dictionary with the fitted params, the RMSE of the prices and
+    the number of pricing calls the fit took.
+    """
+    from scipy.optimize import least_squares
+
+    start = _model_params(model, start)
+    grid = COSGrid(S0, r, K, T, model, start, n_terms)
+    prices = np.asarray(prices, dtype=float)
+
+    def residuals(params):
+        return grid.prices(tuple(params), option) - prices
+
+    fit = least_squares(residuals, start, bounds=bounds if bounds is not None else (-np.inf, np.inf))
+    return {
+        "params": dict(zip(MODELS[model], fit.x)),
+        "rmse": float(np.sqrt(np.mean(fit.fun ** 2))),
+        "n_evaluations": fit.nfev,
+    }
+
+
+if __name__ == "__main__":
+
+    import time
+
+    from batch import bsm_batch
+
+    S0 = 100
+    K = 105
+    T = 1
+    r = 0.05
+    sigma = 0.2
+
+    exact = bsm_batch(S0, K, T, r, sigma)
+    print(f"BSM call {float(exact['call']):.6f}, COS {float(cos_price('bs', S0, K, T, r, [sigma])[0]):.6f}, "
+          f"FFT {float(fft_price('bs', S0, K, T, r, [sigma])[0]):.6f}")
+
+    strikes = np.linspace(60, 160, 101)
+    heston = {"v0": 0.04, "kappa": 1.5, "theta": 0.05, "xi": 0.5, "rho": -0.7}
+    merton = {"sigma": 0.15, "lam": 0.5, "mu_j": -0.1, "delta_j": 0.15}
+    vg = {"sigma": 0.2, "theta": -0.15, "nu": 0.2}
+    for model, params in (("heston", heston), ("merton", merton), ("vg", vg)):
+        cos = cos_price(model, S0, strikes, T, r, params)
+        fft = fft_price(model, S0, strikes, T, r, params)
+        print(f"{model:>7}: ATM call {cos[40]:.6f}, max |COS - FFT| over {strikes.size} strikes "
+              f"{np.max(np.abs(cos - fft)):.2e}")
+        assert np.max(np.abs(cos - fft)) < 1e-5, model
+
+    # Calibrate Heston to a surface generated by the model itself
+    expiries = np.array([0.25, 0.5, 1.0, 2.0])
+    K_surface, T_surface = (x.ravel() for x in np.meshgrid(np.linspace(70, 140, 29), expiries))
+    quotes = cos_price("heston", S0, K_surface, T_surface, r, heston)
+    start_time = time.perf_counter()
+    fit = calibrate("heston", S0, r, K_surface, T_surface, quotes,
+                    start={"v0": 0.02, "kappa": 1.0, "theta": 0.03, "xi": 0.3, "rho": -0.3},
+                    bounds=([1e-4, 0.05, 1e-4, 0.05, -0.99], [1.0, 10.0, 1.0, 2.0, 0.99]))
+    print(f"Heston calibration to {quotes.size} quotes in {time.perf_counter() - start_time:.2f} s, "
+          f"RMSE {fit['rmse']:.2e}, {fit['n_evaluations']} evaluations")
+    print("  " + ", ".join(f"{name} {value:.4f}" for name, value in fit["params"].items()))
@@ -1,9 +1,15 @@
 import numpy as np
-from scipy.stats import norm
-from scipy.optimize import brentq
+
+from batch import bsm_batch, ndtr
+from contracts import OptionContract, MarketState, bsm_call, bsm_greeks, bsm_intermediates
+from implied_vol import implied_vol, ABOVE_UPPER_BOUND, BELOW_INTRINSIC, CONVERGED
+from lattice import lattice_price
+from monte_carlo import mc_european, mc_european_parallel
 
 
 class VIII_Solvers:
+    __slots__ = ("S0", "K", "T", "r", "sigma", "n_sim", "t")
+
     def __init__(self,S0 = None,K = None,T = None,r = None,sigma = None,n_sim = 0,t = 0):
         self.S0 = S0
         self.K = K
@@ -14,76 +20,138 @@ class VIII_Solvers:
         self.t = t
         return
 
-    def mc_call(self):
-        random_vals = np.random.normal(0, 1, self.n_sim, )
-
-        shock = self.sigma * np.sqrt(self.T) * random_vals
-        drift = (self.r - (self.sigma ** 2) / 2)
-        S_T = self.S0 * np.exp(drift * self.T + shock)
+    def mc_price(self, tol=None, confidence=0.95, seed=None, n_workers=1):
+        """
+        Call and put priced from the same streamed draws, with standard errors
+        and confidence intervals (see monte_carlo.mc_european)
 
-        call_payoff = np.maximum(S_T - self.K, 0)
-        call_price = np.average(call_payoff) * np.exp(-self.r * self.T)
+        A seed makes the run reproducible; n_workers > 1 splits the paths over
+        a process pool with independent SeedSequence streams (tol is then ignored).
+        """
+        if n_workers > 1:
+            return mc_european_parallel(self.S0, self.K, self.T, self.r, self.sigma, self.n_sim,
+                                        n_workers=n_workers, seed=seed, confidence=confidence)
+        return mc_european(self.S0, self.K, self.T, self.r, self.sigma, self.n_sim,
+                           tol=tol, confidence=confidence, rng=np.random.default_rng(seed))
 
-        return float(call_price)
+    def mc_call(self):
+        return self.mc_price().call
 
     def mc_put(self):
+        return self.mc_price().put
 
-        random_vals = np.random.normal(0, 1, self.n_sim, )
-
-        shock = self.sigma * np.sqrt(self.T) * random_vals
-        drift = (self.r - (self.sigma ** 2) / 2)
-
-        S_T = self.S0 * np.exp(drift * self.T + shock)
+    def lattice(self, option="put", american=True, n_steps=500, method="crr"):
+        """
+        American (or European) price, delta, gamma and theta from a
+        binomial or trinomial tree (see lattice.lattice_price)
+        """
+        results = lattice_price(self.S0, self.K, self.T - self.t, self.r, self.sigma,
+                                n_steps=n_steps, option=option, american=american, method=method)
+        return {name: float(value) for name, value in results.items()}
 
-        put_payoff = np.maximum(self.K - S_T, 0)
+    def _intermediates(self):
+        """
+        (d1, d2, N(d1), N(d2), N(-d1), N(-d2), N'(d1), K*e^(-r(T-t))) from the
+        bounded LRU cache in contracts.bsm_intermediates, keyed on the current
+        S0, K, T, r, sigma and t. Returns None when any input is an array,
+        which then takes the NumPy path instead. On the expiry date and for
+        σ = 0 the values are the limits (see contracts.bsm_intermediates).
+        """
+        state = (self.S0, self.K, self.T, self.r, self.sigma, self.t)
+        for value in state:
+            if not isinstance(value, (int, float)):
+                return None
+        return bsm_intermediates(*state)
 
-        put_price = np.average(put_payoff) * np.exp(-self.r * self.T)
+    @staticmethod
+    def cache_info():
+        return bsm_intermediates.cache_info()
 
-        return float(put_price)
+    @staticmethod
+    def clear_cache():
+        bsm_intermediates.cache_clear()
 
     def d1(self):
+        cached = self._intermediates()
+        if cached is not None:
+            return cached[0]
+
         d1 = (np.log(self.S0 / self.K) + (self.r + (self.sigma ** 2) / 2) * (self.T - self.t)) / (
                     self.sigma * np.sqrt(self.T - self.t))
         return d1
 
     def d2(self):
+        cached = self._intermediates()
+        if cached is not None:
+            return cached[1]
+
         d2 = self.d1() - self.sigma * np.sqrt(self.T - self.t)
         return d2
 
     def BSM_call(self):
+        cached = self._intermediates()
+        if cached is not None:
+            return self.S0 * cached[2] - cached[7] * cached[3]
+
         d1 = self.d1()
         d2 = self.d2()
-        call_price = self.S0 * norm.cdf(d1) - self.K * np.exp(-self.r * (self.T - self.t)) * norm.cdf(d2)
+        call_price = self.S0 * ndtr(d1) - self.K * np.exp(-self.r * (self.T - self.t)) * ndtr(d2)
         return call_price
 
     def BSM_put(self):
+        cached = self._intermediates()
+        if cached is not None:
+            return -self.S0 * cached[4] + cached[7] * cached[5]
+
         d1 = self.d1()
         d2 = self.d2()
-        put_price = -self.S0 * norm.cdf(-d1) + self.K * np.exp(-self.r * (self.T - self.t)) * norm.cdf(-d2)
+        put_price = -self.S0 * ndtr(-d1) + self.K * np.exp(-self.r * (self.T - self.t)) * ndtr(-d2)
         return put_price
 
-    def objective(self,sigma,market_price):
-        original_sigma = self.sigma
-        self.sigma = sigma
+    def contract(self):
+        """Immutable snapshot of the contract terms"""
+        return OptionContract(self.K, self.T)
 
-        price_diff = self.BSM_call() - market_price
+    def market(self):
+        """Immutable snapshot of the market state"""
+        return MarketState(self.S0, self.r, self.sigma, self.t)
 
-        self.sigma = original_sigma
+    def objective(self,sigma,market_price):
+        # Prices off a copy of the market state, so self.sigma is never touched
+        price_diff = bsm_call(self.contract(), self.market().with_sigma(sigma)) - market_price
         return price_diff
 
     def BSM_IV(self,market_price):
-        implied_vol = brentq(self.objective, 0.01, 5.0, args=(market_price))
-        return implied_vol
+        """
+        Implied volatility of a call quote. Quotes outside the no-arbitrage
+        bounds max(S - K*exp(-r(T-t)), 0) < C < S have no implied volatility.
+        """
+        sigma, status = implied_vol(market_price, self.S0, self.K, self.T, self.r, self.t)
+        if status == CONVERGED:
+            return float(sigma)
+        if status == BELOW_INTRINSIC:
+            raise ValueError(f"market_price {market_price} is at or below intrinsic value (BELOW_INTRINSIC)")
+        if status == ABOVE_UPPER_BOUND:
+            raise ValueError(f"market_price {market_price} is at or above the spot price (ABOVE_UPPER_BOUND)")
+
+        # Fall back to bracketing for the rare quote the Halley iteration does not settle
+        from scipy.optimize import brentq
+
+        implied_vol_brentq = brentq(self.objective, 0.01, 5.0, args=(market_price))
+        return implied_vol_brentq
 
     def call_delta(self):
         """
         delta
         ∆ = ∆C/∆S = N(d1)
         """
+        cached = self._intermediates()
+        if cached is not None:
+            return cached[2]
 
         d1 = self.d1()
 
-        delta = norm.cdf(d1)
+        delta = ndtr(d1)
 
         return delta
 
@@ -93,6 +161,8 @@ class VIII_Solvers:
 
         N'(d1) = f(d1) = 1/sqrt(2*π) * exp(-x^2/2), Normal distribution using mu = 0, σ = 1
         """
+        if self._intermediates() is not None:
+            return bsm_greeks(self.contract(), self.market())["gamma"]
 
         N_prime_d1= np.exp( (-self.d1()**2) / 2 ) /np.sqrt(2*np.pi)
         gamma = N_prime_d1/(self.S0*self.sigma*np.sqrt(self.T-self.t))
@@ -100,6 +170,8 @@ class VIII_Solvers:
         return gamma
 
     def call_vega(self):
+        if self._intermediates() is not None:
+            return bsm_greeks(self.contract(), self.market())["vega"]
 
         N_prime_d1 = np.exp( (-self.d1()**2) / 2 ) /np.sqrt(2*np.pi)
         vega = self.S0*np.sqrt(self.T-self.t)*N_prime_d1
@@ -108,12 +180,37 @@ class VIII_Solvers:
 
     def call_theta(self):
 
+        """
+        Θ = -S N'(d1) σ/(2 sqrt(T-t)) - r K e^(-r(T-t)) N(d2)
+        """
+        if self._intermediates() is not None:
+            return bsm_greeks(self.contract(), self.market())["theta"]
+
         N_prime_d1 = np.exp((-self.d1() ** 2) / 2) / np.sqrt(2 * np.pi)
         theta = ((-N_prime_d1 * self.S0 * self.sigma )/ ( np.sqrt(self.T-self.t)*2 )
-                 - self.r*self.K*np.exp(-self.r*self.T)*self.d2())
+                 - self.r*self.K*np.exp(-self.r*(self.T-self.t))*ndtr(self.d2()))
 
         return theta
 
+    def greeks(self, option="call"):
+        """
+        Price, delta, gamma, vega, theta, rho, vanna, volga and charm of a call
+        or put, with d1, d2, N(d1), N'(d1) and the discount factor evaluated once
+        (see contracts.bsm_greeks). Array inputs are priced by batch.bsm_batch
+        and give arrays under the same names.
+        """
+        if self._intermediates() is not None:
+            return bsm_greeks(self.contract(), self.market(), option)
+        if option not in ("call", "put"):
+            raise ValueError("option must be 'call' or 'put'")
+
+        results = bsm_batch(self.S0, self.K, self.T, self.r, self.sigma, self.t)
+        greeks = {name: results[name] for name in ("d1", "d2", "gamma", "vega", "vanna", "volga", "charm")}
+        for name in ("delta", "theta", "rho"):
+            greeks[name] = results[f"{option}_{name}"]
+        greeks["price"] = results[option]
+        return greeks
+
 
 
 
@@ -136,6 +233,14 @@ if __name__ == "__main__":
 
 
 
+    for method in (VIII_Solvers.mc_call, VIII_Solvers.mc_put):
+        try:
+            method(VIII_Solvers(S0, K, T, r, sigma, 0))
+        except ValueError as error:
+            print(f"Rejected: {error}")
+        else:
+            raise AssertionError(f"{method.__name__} accepted n_sim = 0")
+
     print("\nUsing monte Carlo simulations:")
     print(f"Call Price: {monte_call:.4f}, Put Price: {monte_put:.4f}\n")
 
@@ -146,7 +251,17 @@ if __name__ == "__main__":
 
     IV = solver.BSM_IV(market_price)
 
-    print(f"Implied volatility: {IV:.4f}\n")
+    print(f"Implied volatility: {IV:.4f}")
+
+    # Quotes outside the no-arbitrage bounds have no implied volatility
+    for quote in (200.0, 0.0):
+        try:
+            solver.BSM_IV(quote)
+        except ValueError as error:
+            print(f"Rejected: {error}")
+        else:
+            raise AssertionError(f"BSM_IV accepted {quote}")
+    print()
 
 
     print("The Greeks")
@@ -155,4 +270,8 @@ if __name__ == "__main__":
     vega = solver.call_vega()
     theta = solver.call_theta()
     print(f"Delta: {delta:.4f}, Gamma: {gamma:.4f}")
-    print(f"Vega: {vega:.4f}, Theta: {theta:.4f}")
\ No newline at end of file
+    print(f"Vega: {vega:.4f}, Theta: {theta:.4f}")
+
+    put_greeks = solver.greeks("put")
+    print(f"Put Delta: {put_greeks['delta']:.4f}, Put Theta: {put_greeks['theta']:.4f}, "
+          f"Put Rho: {put_greeks['rho']:.4f}")
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Daily settlement, margin accounts and margin calls for books of futures positions.
+
+Each day's variation margin is
+
+    VM_t = position × contract size × multiplier × (F_t - F_{t-1})
+
+and the margin balance is the initial margin plus the cumulative variation
+margin C_t since the last margin call. When the balance drops below the
+maintenance margin, the account is topped back up to the initial margin, so
+the path only resets at margin calls. The next call after a reset at day τ
+is the first t > τ with C_t - C_τ < MM - IM. That is found for every
+contract at once with one argmax over the days, so the loop runs once per
+call event rather than once per day. Balances, cumulative deposits and
+financing costs then follow from cumulative sums.
+"""
+
+import numpy as np
+
+DAYS_PER_YEAR = 252
+
+
+def margin_account(settlement, position, contract_size=1.0, multiplier=1.0, initial_margin=0.0,
+                   maintenance_margin=0.0, funding_rate=0.0, margin_rate=0.0):
+    """
+    Settle futures positions against daily settlement prices.
+
+    settlement: (n_contracts, n_days + 1) prices, column 0 being the trade price
+    position: signed number of contracts, positive long and negative short
+    initial_margin, maintenance_margin: per contract
+    funding_rate: annual rate paid on the cash deposited (initial margin plus calls)
+    margin_rate: annual rate earned on the margin balance
+
+    Returns a dictionary of arrays: variation_margin, balance and margin_calls
+    of shape (n_contracts, n_days), and per contract n_calls, total_calls,
+    pnl (the terminal profit or loss) and financing_cost.
+    """
+    settlement = np.atleast_2d(np.asarray(settlement, dtype=float))
+    n, n_days = settlement.shape[0], settlement.shape[1] - 1
+    position, contract_size, multiplier, initial_margin, maintenance_margin = (
+        np.broadcast_to(np.asarray(x, dtype=float), (n,))
+        for x in (position, contract_size, multiplier, initial_margin, maintenance_margin))
+
+    units = position * contract_size * multiplier
+    variation_margin = units[:, None] * np.diff(settlement, axis=1)
+    cumulative = np.cumsum(variation_margin, axis=1)
+    im = np.abs(position) * initial_margin
+    threshold = np.abs(position) * maintenance_margin - im
+
+    margin_calls = np.zeros((n, n_days))
+    reference = np.zeros(n)
+    start = np.zeros(n, dtype=np.intp)
+    active = np.arange(n)
+    days = np.arange(n_days)
+    while active.size:
+        first = start[active].min()
+        drawdown = cumulative[active, first:] - reference[active, None]
+        breach = (drawdown < threshold[active, None]) & (days[first:] >= start[active, None])
+        hit = breach.any(axis=1)
+        active = active[hit]
+        # Nothing left to call, e.g. every remaining account was last topped up on the final day
+        if not active.size:
+            break
+        day = first + breach[hit].argmax(axis=1)
+        # Top up to the initial margin; the balance then restarts from there
+        margin_calls[active, day] = reference[active] - cumulative[active, day]
+        reference[active] = cumulative[active, day]
+        start[active] = day + 1
+
+    deposits = np.cumsum(margin_calls, axis=1)
+    balance = im[:, None] + cumulative + deposits
+    dt = 1 / DAYS_PER_YEAR
+    financing_cost = dt * (funding_rate * (im[:, None] + deposits) - margin_rate * balance).sum(axis=1)
+
+    return {
+        "variation_margin": variation_margin,
+        "balance": balance,
+        "margin_calls": margin_calls,
+        "n_calls": np.count_nonzero(margin_calls, axis=1),
+        "total_calls": deposits[:, -1] if n_days else np.zeros(n),
+        "pnl": cumulative[:, -1] if n_days else np.zeros(n),
+        "financing_cost": financing_cost,
+    }
+
+
+def simulate_liquidity(F0, sigma, n_days, position, contract_size=1.0, multiplier=1.0, initial_margin=0.0,
+                       maintenance_margin=0.0, mu=0.0, funding_rate=0.0, n_paths=10000, rng=None,
+                       quantiles=(0.5, 0.95, 0.99)):
+    """
+    Distribution of the liquidity needed to meet margin calls on one position,
+    over n_days of settlement prices simulated as GBM, F_t = F_{t-1} e^((μ - σ^2/2)dt + σ sqrt(dt) Z).
+
+    Returns the margin_account result over all paths plus quantiles of the
+    total margin calls and of the number of calls.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    dt = 1 / DAYS_PER_YEAR
+    log_steps = (mu - sigma ** 2 / 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal((n_paths, n_days))
+    paths = np.empty((n_paths, n_days + 1))
+    paths[:, 0] = F0
+    paths[:, 1:] = F0 * np.exp(np.cumsum(log_steps, axis=1))
+
+    result = margin_account(paths, position, contract_size, multiplier, initial_margin, maintenance_margin,
+                            funding_rate)
+    result["call_quantiles"] = dict(zip(quantiles, np.quantile(result["total_calls"], quantiles)))
+    result["n_calls_quantiles"] = dict(zip(quantiles, np.quantile(result["n_calls"], quantiles)))
+    return result
+
+
+if __name__ == "__main__":
+
+    # Hull's gold example: long 2 contracts of 100 oz at $1,250, IM $6,000, MM $4,500 per contract
+    gold = [1250.0, 1241.0, 1238.3, 1244.6, 1241.3, 1240.1, 1236.2, 1229.9, 1230.8, 1225.4, 1228.1,
+            1211.0, 1211.0, 1214.3, 1216.1, 1223.0, 1226.9]
+    account = margin_account(gold, position=2, contract_size=100, initial_margin=6000, maintenance_margin=4500)
+    for day in np.nonzero(account["margin_calls"][0])[0]:
+        print(f"Day {day + 1}: balance before call ${account['balance'][0, day] - account['margin_calls'][0, day]:,.0f}, "
+              f"margin call ${account['margin_calls'][0, day]:,.0f}")
+    print(f"Final balance ${account['balance'][0, -1]:,.0f}, P/L ${float(account['pnl'][0]):,.0f}")
+
+    # A call on the final day, no settlement days at all, and short paths with late calls
+    final_day = margin_account([[100, 99, 98, 80]], 1, initial_margin=10, maintenance_margin=5)
+    assert final_day["n_calls"][0] == 1 and final_day["margin_calls"][0, -1] == 20
+    assert margin_account([[100]], 1, initial_margin=10, maintenance_margin=5)["n_calls"][0] == 0
+    for seed in range(50):
+        simulate_liquidity(100, 0.4, 5, 1, initial_margin=6, maintenance_margin=4.5, n_paths=20,
+                           rng=np.random.default_rng(seed))
+
+    # Liquidity needs of a short position in 10 equity index futures over a year
+    liquidity = simulate_liquidity(F0=5000, sigma=0.2, n_days=252, position=-10, multiplier=50,
+                                   initial_margin=25000, maintenance_margin=20000, funding_rate=0.05,
+                                   n_paths=20000, rng=np.random.default_rng(0))
+    for q, amount in liquidity["call_quantiles"].items():
+        print(f"{q:.0%} quantile of total margin calls: ${amount:,.0f} "
+              f"({liquidity['n_calls_quantiles'][q]:.0f} calls)")
+    print(f"Mean financing cost ${liquidity['financing_cost'].mean():,.0f}")
@@ -0,0 +1,156 @@
+"""
+Vectorized implied volatility solver for European calls and puts.
+
+Quotes are solved all at once: a Corrado-Miller rational approximation
+gives the starting point and a handful of safeguarded Halley steps using
+vega and volga polish every element in the same array operation.
+"""
+
+import numpy as np
+
+from batch import ndtr
+
+# Per-element status codes returned next to the implied volatilities
+CONVERGED = 0
+NOT_CONVERGED = 1
+BELOW_INTRINSIC = 2
+ABOVE_UPPER_BOUND = 3
+
+SIGMA_MIN = 1e-6
+SIGMA_MAX = 10.0
+
+
+def _initial_guess(price, S0, K_disc, tau):
+    """
+    Corrado-Miller approximation for a call price
+
+    σ ≈ sqrt(2π)/((S+X)sqrt(T)) * [C - (S-X)/2 + sqrt((C - (S-X)/2)^2 - (S-X)^2/π)]
+
+    Where the radicand is negative (deep in or out of the money) the
+    Manaster-Koehler start sqrt(2|ln(S/X)|/T) is used instead.
+    """
+    moneyness = S0 - K_disc
+    centered = price - moneyness / 2
+    radicand = centered ** 2 - moneyness ** 2 / np.pi
+
+    with np.errstate(invalid="ignore"):
+        corrado_miller = (np.sqrt(2 * np.pi) / ((S0 + K_disc) * np.sqrt(tau))
+                          * (centered + np.sqrt(radicand)))
+        manaster_koehler = np.sqrt(2 * np.abs(np.log(S0 / K_disc)) / tau)
+
+    guess = np.where((radicand >= 0) & (corrado_miller > 0), corrado_miller, manaster_koehler)
+    return np.clip(guess, 1e-2, 5.0)
+
+
+def implied_vol(price, S0, K, T, r, t=0, option="call", tol=1e-10, max_iter=40):
+    """
+    Solve the Black-Scholes implied volatility for arrays of option quotes.
+
+    Put quotes are mapped to calls through put-call parity, so a single
+    solver handles both. Quotes outside the no-arbitrage bounds
+        max(S - K*exp(-r(T-t)), 0) < C < S
+    are not solved; they come back as NaN with a status code. tol is in
+    volatility units: an element has converged once the Newton step
+    |C(σ) - price|/vega or its bisection bracket is below tol. Quotes with
+    almost no vega may need the bisection steps, hence the max_iter head room.
+
+    Returns (sigma, status) arrays with the broadcast shape of the inputs.
+    """
+    if option not in ("call", "put"):
+        raise ValueError("option must be 'call' or 'put'")
+
+    price, S0, K, T, r, t = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (price, S0, K, T, r, t)))
+
+    tau = T - t
+    K_disc = K * np.exp(-r * tau)
+    call_price = price if option == "call" else price + S0 - K_disc
+
+    sigma = np.full(price.shape, np.nan)
+    status = np.full(price.shape, NOT_CONVERGED, dtype=np.int8)
+
+    lower = np.maximum(S0 - K_disc, 0)
+    below = call_price <= lower
+    above = call_price >= S0
+    status[below] = BELOW_INTRINSIC
+    status[above] = ABOVE_UPPER_BOUND
+
+    idx = np.flatnonzero(~(below | above))
+    C = call_price.ravel()[idx]
+    S = S0.ravel()[idx]
+    X = K_disc.ravel()[idx]
+    sqrt_tau = np.sqrt(tau.ravel()[idx])
+    log_moneyness = np.log(S / X)
+
+    # Bracket kept per element so a wild Halley step falls back to bisection
+    lo = np.full(idx.size, SIGMA_MIN)
+    hi = np.full(idx.size, SIGMA_MAX)
+    sig = _initial_guess(C, S, X, sqrt_tau ** 2)
+
+    for _ in range(max_iter):
+        if idx.size == 0:
+            break
+
+        sig_sqrt_tau = sig * sqrt_tau
+        d1 = log_moneyness / sig_sqrt_tau + sig_sqrt_tau / 2
+        d2 = d1 - sig_sqrt_tau
+
+        diff = S * ndtr(d1) - X * ndtr(d2) - C
+        vega = S * sqrt_tau * np.exp(-(d1 ** 2) / 2) / np.sqrt(2 * np.pi)
+        volga = vega * d1 * d2 / sig
+
+        # |diff|/vega is the next Newton step, so this measures convergence in σ
+        done = (np.abs(diff) <= tol * vega) | (hi - lo <= tol)
+        if done.any():
+            sigma.ravel()[idx[done]] = sig[done]
+            status.ravel()[idx[done]] = CONVERGED
+            keep = ~done
+            idx, C, S, X, sqrt_tau, log_moneyness = (
+                idx[keep], C[keep], S[keep], X[keep], sqrt_tau[keep], log_moneyness[keep])
+            lo, hi, sig, diff, vega, volga = lo[keep], hi[keep], sig[keep], diff[keep], vega[keep], volga[keep]
+
+        # The call price is increasing in σ, which tightens the bracket
+        hi = np.where(diff > 0, sig, hi)
+        lo = np.where(diff < 0, sig, lo)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = diff / vega
+            step = newton / (1 - newton * volga / (2 * vega))
+            candidate = sig - step
+
+        outside = ~np.isfinite(candidate) | (candidate <= lo) | (candidate >= hi)
+        sig = np.where(outside, (lo + hi) / 2, candidate)
+
+    if idx.size:
+        sigma.ravel()[idx] = sig
+
+    return sigma, status
+
+
+if __name__ == "__main__":
+
+    S0 = 100
+    K = 105
+    T = 1
+    r = 0.05
+    market_price = 6.8
+
+    sigma, status = implied_vol(market_price, S0, K, T, r)
+    print(f"Implied volatility: {float(sigma):.4f} (status {int(status)})")
+
+    n_quotes = 1000000
+    rng = np.random.default_rng(0)
+    strikes = rng.uniform(60, 160, n_quotes)
+    expiries = rng.uniform(0.05, 2, n_quotes)
+    true_vols = rng.uniform(0.1, 0.6, n_quotes)
+
+    from batch import bsm_batch
+    chain = bsm_batch(S0, strikes, expiries, r, true_vols)
+
+    sigma, status = implied_vol(chain["put"], S0, strikes, expiries, r, option="put")
+    solved = status == CONVERGED
+    # Quotes with almost no vega pin down σ only loosely, so judge accuracy where vega matters
+    sensitive = solved & (chain["vega"] > 1e-4)
+    error = np.max(np.abs(sigma[sensitive] - true_vols[sensitive]))
+    print(f"Solved {solved.sum()} of {n_quotes} put quotes, max error {error:.2e}")
+    assert not np.any(status == NOT_CONVERGED) and error < 1e-8
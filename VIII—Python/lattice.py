@@ -0,0 +1,190 @@
+"""
+Binomial and trinomial lattices for American and European options.
+
+Backward induction works on a whole layer of the tree per NumPy operation,
+and contracts of equal depth are stacked into a 2-D lattice (one row per
+contract), so a batch of contracts is priced with a loop over time steps only.
+Delta, gamma and theta are read off the first layers of the tree.
+"""
+
+import numpy as np
+
+METHODS = ("crr", "leisen-reimer", "trinomial")
+MIN_STEPS = {"crr": 3, "leisen-reimer": 3, "trinomial": 2}
+
+
+def _peizer_pratt(z, n):
+    """
+    Peizer-Pratt method 2 inversion used by Leisen-Reimer
+
+    h(z) = 1/2 + sign(z)/2 * sqrt(1 - exp(-(z/(n + 1/3 + 0.1/(n+1)))^2 * (n + 1/6)))
+    """
+    return 0.5 + np.sign(z) * 0.5 * np.sqrt(
+        1 - np.exp(-((z / (n + 1 / 3 + 0.1 / (n + 1))) ** 2) * (n + 1 / 6)))
+
+
+def _binomial_parameters(S0, K, T, r, sigma, n_steps, method):
+    """Up/down factors and risk-neutral up probability per contract."""
+    dt = T / n_steps
+    growth = np.exp(r * dt)
+
+    if method == "crr":
+        u = np.exp(sigma * np.sqrt(dt))
+        d = 1 / u
+        p = (growth - d) / (u - d)
+    else:
+        sig_sqrt_T = sigma * np.sqrt(T)
+        d1 = (np.log(S0 / K) + (r + (sigma ** 2) / 2) * T) / sig_sqrt_T
+        d2 = d1 - sig_sqrt_T
+        p = _peizer_pratt(d2, n_steps)
+        p_prime = _peizer_pratt(d1, n_steps)
+        u = growth * p_prime / p
+        d = (growth - p * u) / (1 - p)
+
+    return u, d, p
+
+
+def _binomial(S0, K, T, r, sigma, n_steps, sign, american, method):
+    u, d, p = _binomial_parameters(S0, K, T, r, sigma, n_steps, method)
+    disc = np.exp(-r * T / n_steps)[:, None]
+    p = p[:, None]
+
+    log_S0 = np.log(S0)[:, None]
+    log_d = np.log(d)[:, None]
+    # ln S(i, j) = ln S0 + i*ln d + j*ln(u/d), j = 0..i up-moves
+    j_log_ratio = np.arange(n_steps + 1) * np.log(u / d)[:, None]
+    K = K[:, None]
+
+    V = np.maximum(sign * (np.exp(log_S0 + n_steps * log_d + j_log_ratio) - K), 0)
+    layers = {}
+
+    for i in range(n_steps - 1, -1, -1):
+        V = disc * (p * V[:, 1:i + 2] + (1 - p) * V[:, :i + 1])
+        if american or i <= 2:
+            S = np.exp(log_S0 + i * log_d + j_log_ratio[:, :i + 1])
+        if american:
+            np.maximum(V, sign * (S - K), out=V)
+        if i <= 2:
+            layers[i] = (V, S)
+
+    return _tree_greeks(layers, T / n_steps, step_for_theta=2)
+
+
+def _trinomial(S0, K, T, r, sigma, n_steps, sign, american):
+    """
+    Boyle trinomial tree with u = exp(σ*sqrt(2dt)), d = 1/u, m = 1 and
+
+    p_u = ((e^(r dt/2) - e^(-σ sqrt(dt/2))) / (e^(σ sqrt(dt/2)) - e^(-σ sqrt(dt/2))))^2
+    p_d = ((e^(σ sqrt(dt/2)) - e^(r dt/2)) / (e^(σ sqrt(dt/2)) - e^(-σ sqrt(dt/2))))^2
+    """
+    dt = T / n_steps
+    half = np.exp(sigma * np.sqrt(dt / 2))
+    growth = np.exp(r * dt / 2)
+    p_u = (((growth - 1 / half) / (half - 1 / half)) ** 2)[:, None]
+    p_d = (((half - growth) / (half - 1 / half)) ** 2)[:, None]
+    p_m = 1 - p_u - p_d
+    disc = np.exp(-r * dt)[:, None]
+
+    log_S0 = np.log(S0)[:, None]
+    log_u = (sigma * np.sqrt(2 * dt))[:, None]
+    # ln S(i, j) = ln S0 + j*ln u, j = -i..i
+    j = np.arange(-n_steps, n_steps + 1)
+    K = K[:, None]
+
+    V = np.maximum(sign * (np.exp(log_S0 + j * log_u) - K), 0)
+    layers = {}
+
+    for i in range(n_steps - 1, -1, -1):
+        V = disc * (p_d * V[:, :2 * i + 1] + p_m * V[:, 1:2 * i + 2] + p_u * V[:, 2:2 * i + 3])
+        if american or i <= 1:
+            S = np.exp(log_S0 + np.arange(-i, i + 1) * log_u)
+        if american:
+            np.maximum(V, sign * (S - K), out=V)
+        if i <= 1:
+            layers[i] = (V, S)
+
+    return _tree_greeks(layers, dt, step_for_theta=1)
+
+
+def _tree_greeks(layers, dt, step_for_theta):
+    """
+    Delta and gamma from finite differences across the first layers of the tree,
+    theta from the middle node of a later layer, which sits at (or near) S0.
+    """
+    V0 = layers[0][0][:, 0]
+    V1, S1 = layers[1]
+
+    if step_for_theta == 2:
+        delta = (V1[:, 1] - V1[:, 0]) / (S1[:, 1] - S1[:, 0])
+        V2, S2 = layers[2]
+    else:
+        delta = (V1[:, 2] - V1[:, 0]) / (S1[:, 2] - S1[:, 0])
+        V2, S2 = V1, S1
+
+    upper = (V2[:, 2] - V2[:, 1]) / (S2[:, 2] - S2[:, 1])
+    lower = (V2[:, 1] - V2[:, 0]) / (S2[:, 1] - S2[:, 0])
+    gamma = (upper - lower) / ((S2[:, 2] - S2[:, 0]) / 2)
+    # Leisen-Reimer trees do not recombine exactly at S0, so move the middle
+    # node back to S0 with delta and gamma before differencing in time
+    shift = S2[:, 1] - layers[0][1][:, 0]
+    theta = (V2[:, 1] - delta * shift - gamma * shift ** 2 / 2 - V0) / (step_for_theta * dt)
+
+    return {"price": V0, "delta": delta, "gamma": gamma, "theta": theta}
+
+
+def lattice_price(S0, K, T, r, sigma, n_steps=500, option="put", american=True, method="crr"):
+    """
+    Price American or European options on a lattice.
+
+    method is "crr" (Cox-Ross-Rubinstein), "leisen-reimer" or "trinomial".
+    Leisen-Reimer needs an odd number of steps, so n_steps is rounded up.
+    Binomial trees need at least 3 steps and trinomial trees 2 (MIN_STEPS).
+    Inputs may be arrays: all contracts share the same depth n_steps and are
+    rolled back together, one row of the lattice per contract.
+
+    Returns a dictionary with price, delta, gamma and theta arrays.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    if option not in ("call", "put"):
+        raise ValueError("option must be 'call' or 'put'")
+    if method == "leisen-reimer" and n_steps % 2 == 0:
+        n_steps += 1
+    # The Greeks read the first rolled-back layers: up to layer 2 of a binomial tree, layer 1 of a trinomial
+    min_steps = MIN_STEPS[method]
+    if n_steps < min_steps:
+        raise ValueError(f"n_steps must be at least {min_steps} for method '{method}'")
+
+    inputs = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S0, K, T, r, sigma)))
+    shape = inputs[0].shape
+    S0, K, T, r, sigma = (x.ravel() for x in inputs)
+    sign = 1 if option == "call" else -1
+
+    if method == "trinomial":
+        results = _trinomial(S0, K, T, r, sigma, n_steps, sign, american)
+    else:
+        results = _binomial(S0, K, T, r, sigma, n_steps, sign, american, method)
+
+    return {name: values.reshape(shape) for name, values in results.items()}
+
+
+if __name__ == "__main__":
+
+    S0 = 100
+    K = 105
+    T = 1
+    r = 0.05
+    sigma = 0.2
+
+    for method in METHODS:
+        american = lattice_price(S0, K, T, r, sigma, n_steps=501, method=method)
+        european = lattice_price(S0, K, T, r, sigma, n_steps=501, method=method, american=False)
+        print(f"{method:>14}: American put {float(american['price']):.4f}, "
+              f"European put {float(european['price']):.4f}, "
+              f"Delta {float(american['delta']):.4f}, Gamma {float(american['gamma']):.4f}, "
+              f"Theta {float(american['theta']):.4f}")
+
+    strikes = np.linspace(80, 120, 1000)
+    batch = lattice_price(S0, strikes, T, r, sigma, n_steps=200)
+    print(f"\nBatch of {strikes.size} American puts, K=80..120: "
+          f"{batch['price'][0]:.4f} .. {batch['price'][-1]:.4f}")
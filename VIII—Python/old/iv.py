@@ -1,7 +1,6 @@
 import numpy as np
 from scipy.stats import norm
 from scipy.optimize import brentq
-import yfinance as yf
 
 def black_scholes(S0, K, T, r,sigma):
     t = 0
@@ -1,7 +1,4 @@
-import yfinance as yf
 import numpy as np
-import scipy.stats as st
-import matplotlib.pyplot as plt
 
 
 def monte_carlo_call_price(S0, K, T, r, sigma, n_sim):
@@ -0,0 +1,262 @@
+"""
+Time-stepped GBM Monte Carlo for path-dependent payoffs.
+
+Paths are simulated a chunk at a time and stepped forward in time; payoffs
+only see the current prices and keep their own running aggregates (sums,
+extremes, barrier flags), so the full paths x steps matrix is never held in
+memory. With the Brownian-bridge construction each chunk's Brownian path is
+built coarse-to-fine, which bounds memory by chunk_size x n_steps instead.
+"""
+
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+
+from monte_carlo import RunningMoments
+
+# Upper bound on chunk_size x n_steps for the Brownian-bridge buffer
+BRIDGE_BUFFER_SIZE = 2 ** 22
+
+
+def _option_sign(option):
+    """+1 for a call and -1 for a put."""
+    if option not in ("call", "put"):
+        raise ValueError("option must be 'call' or 'put'")
+    return 1 if option == "call" else -1
+
+
+class ArithmeticAsian:
+    """max(mean(S) - K, 0) for a call, max(K - mean(S), 0) for a put, over the monitoring dates"""
+
+    def __init__(self, K, option="call"):
+        self.K = K
+        self.sign = _option_sign(option)
+
+    def start(self, n):
+        return {"total": np.zeros(n)}
+
+    def step(self, state, S, k):
+        state["total"] += S
+
+    def finish(self, state, S_T, n_steps):
+        return np.maximum(self.sign * (state["total"] / n_steps - self.K), 0)
+
+
+class GeometricAsian:
+    """Same as ArithmeticAsian with the geometric mean exp(mean(ln S))"""
+
+    def __init__(self, K, option="call"):
+        self.K = K
+        self.sign = _option_sign(option)
+
+    def start(self, n):
+        return {"log_total": np.zeros(n)}
+
+    def step(self, state, S, k):
+        state["log_total"] += np.log(S)
+
+    def finish(self, state, S_T, n_steps):
+        return np.maximum(self.sign * (np.exp(state["log_total"] / n_steps) - self.K), 0)
+
+
+class Barrier:
+    """
+    Knock-in or knock-out European option, monitored at every time step.
+
+    kind is one of "up-and-out", "up-and-in", "down-and-out", "down-and-in".
+    """
+
+    KINDS = ("up-and-out", "up-and-in", "down-and-out", "down-and-in")
+
+    def __init__(self, K, barrier, kind, option="call"):
+        if kind not in self.KINDS:
+            raise ValueError(f"kind must be one of {', '.join(self.KINDS)}")
+        self.K = K
+        self.barrier = barrier
+        self.up = kind.startswith("up")
+        self.knock_in = kind.endswith("in")
+        self.sign = _option_sign(option)
+
+    def start(self, n):
+        return {"hit": np.zeros(n, dtype=bool)}
+
+    def step(self, state, S, k):
+        state["hit"] |= (S >= self.barrier) if self.up else (S <= self.barrier)
+
+    def finish(self, state, S_T, n_steps):
+        alive = state["hit"] if self.knock_in else ~state["hit"]
+        return np.where(alive, np.maximum(self.sign * (S_T - self.K), 0), 0.0)
+
+
+class Lookback:
+    """
+    Lookback option on the running extremes of the path.
+
+    Floating strike (K=None): S_T - min(S) for a call, max(S) - S_T for a put.
+    Fixed strike: max(max(S) - K, 0) for a call, max(K - min(S), 0) for a put.
+    """
+
+    def __init__(self, K=None, option="call", S0=None):
+        self.K = K
+        self.call = _option_sign(option) > 0
+        self.S0 = S0
+
+    def start(self, n):
+        start = np.nan if self.S0 is None else self.S0
+        return {"high": np.full(n, start, dtype=float), "low": np.full(n, start, dtype=float)}
+
+    def step(self, state, S, k):
+        np.fmax(state["high"], S, out=state["high"])
+        np.fmin(state["low"], S, out=state["low"])
+
+    def finish(self, state, S_T, n_steps):
+        if self.K is None:
+            return S_T - state["low"] if self.call else state["high"] - S_T
+        if self.call:
+            return np.maximum(state["high"] - self.K, 0)
+        return np.maximum(self.K - state["low"], 0)
+
+
+@dataclass(frozen=True, slots=True)
+class PathMCResult:
+    prices: tuple
+    stderr: tuple
+    ci: tuple
+    n_paths: int
+
+
+def _bridge_schedule(n_steps):
+    """
+    Construction order for a Brownian bridge on t_i = (i+1)*dt, i = 0..n_steps-1.
+
+    The terminal point comes first, then midpoints of ever smaller intervals:
+        W(t_m) = [(t_r - t_m)W(t_l) + (t_m - t_l)W(t_r)]/(t_r - t_l)
+                 + sqrt((t_m - t_l)(t_r - t_m)/(t_r - t_l)) * Z
+    Times are in units of dt; index -1 stands for W(0) = 0.
+    """
+    schedule = [(n_steps - 1, -1, -1, 0.0, 0.0, np.sqrt(n_steps))]
+    intervals = [(-1, n_steps - 1)]
+    while intervals:
+        next_intervals = []
+        for left, right in intervals:
+            if right - left < 2:
+                continue
+            mid = (left + right) // 2
+            span = right - left
+            schedule.append((mid, left, right, (right - mid) / span, (mid - left) / span,
+                             np.sqrt((mid - left) * (right - mid) / span)))
+            next_intervals += [(left, mid), (mid, right)]
+        intervals = next_intervals
+    return schedule
+
+
+def _bridge_paths(rng, n, n_steps, schedule, out):
+    """Fill out (n_steps, n) with Brownian paths in units of sqrt(dt), one row per date."""
+    for index, left, right, w_left, w_right, std in schedule:
+        row = out[index]
+        rng.standard_normal(n, out=row)
+        row *= std
+        if left >= 0:
+            row += w_left * out[left]
+        if right >= 0:
+            row += w_right * out[right]
+    return out
+
+
+def mc_path(S0, r, sigma, T, n_steps, payoffs, n_sim, chunk_size=2 ** 14, rng=None,
+            brownian_bridge=False, confidence=0.95):
+    """
+    Price several path-dependent payoffs from the same simulated GBM paths.
+
+    S(t+dt) = S(t) * exp((r - σ^2/2)dt + σ*sqrt(dt)*Z)
+
+    Each payoff object implements start(n) -> state, step(state, S, k) for the
+    prices at step k = 1..n_steps, and finish(state, S_T, n_steps) -> payoff.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    dt = T / n_steps
+    drift = (r - (sigma ** 2) / 2) * dt
+    vol = sigma * np.sqrt(dt)
+    discount = np.exp(-r * T)
+
+    chunk_size = max(1, min(chunk_size, n_sim))
+    if brownian_bridge:
+        chunk_size = max(1, min(chunk_size, BRIDGE_BUFFER_SIZE // n_steps))
+        schedule = _bridge_schedule(n_steps)
+        W = np.empty((n_steps, chunk_size))
+
+    log_S = np.empty(chunk_size)
+    S = np.empty(chunk_size)
+    values = np.empty((chunk_size, len(payoffs)))
+    moments = RunningMoments(len(payoffs))
+
+    while moments.n < n_sim:
+        m = min(chunk_size, n_sim - moments.n)
+        states = [payoff.start(m) for payoff in payoffs]
+        if brownian_bridge:
+            paths = _bridge_paths(rng, m, n_steps, schedule, W[:, :m])
+
+        for k in range(1, n_steps + 1):
+            if brownian_bridge:
+                np.multiply(paths[k - 1], vol, out=log_S[:m])
+                log_S[:m] += drift * k
+            else:
+                if k == 1:
+                    log_S[:m] = 0.0
+                log_S[:m] += drift + vol * rng.standard_normal(m)
+
+            np.exp(log_S[:m], out=S[:m])
+            S[:m] *= S0
+            for payoff, state in zip(payoffs, states):
+                payoff.step(state, S[:m], k)
+
+        for j, (payoff, state) in enumerate(zip(payoffs, states)):
+            values[:m, j] = payoff.finish(state, S[:m], n_steps)
+        moments.update(values[:m] * discount)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    prices = tuple(float(x) for x in moments.mean)
+    stderr = tuple(float(x) for x in moments.stderr())
+    return PathMCResult(
+        prices=prices,
+        stderr=stderr,
+        ci=tuple((p - z * se, p + z * se) for p, se in zip(prices, stderr)),
+        n_paths=moments.n,
+    )
+
+
+if __name__ == "__main__":
+
+    S0 = 100
+    K = 105
+    T = 1
+    r = 0.05
+    sigma = 0.2
+    n_steps = 252
+
+    payoffs = {
+        "Arithmetic Asian call": ArithmeticAsian(K),
+        "Geometric Asian call": GeometricAsian(K),
+        "Up-and-out call (B=130)": Barrier(K, 130, "up-and-out"),
+        "Up-and-in call (B=130)": Barrier(K, 130, "up-and-in"),
+        "Floating lookback call": Lookback(option="call", S0=S0),
+    }
+
+    result = mc_path(S0, r, sigma, T, n_steps, list(payoffs.values()), n_sim=100000,
+                     rng=np.random.default_rng(0), brownian_bridge=True)
+
+    print(f"Paths: {result.n_paths}, steps: {n_steps}")
+    for name, price, se in zip(payoffs, result.prices, result.stderr):
+        print(f"{name}: {price:.4f} ± {se:.4f}")
+
+    # A misspelt option type must not silently price a put
+    for payoff in (ArithmeticAsian, GeometricAsian, Lookback):
+        try:
+            payoff(K=K, option="Call")
+        except ValueError as error:
+            print(f"Rejected: {error}")
+        else:
+            raise AssertionError(f"{payoff.__name__} accepted option='Call'")
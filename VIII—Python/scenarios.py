@@ -0,0 +1,267 @@
+"""
+Scenario and stress-testing runner for a mixed book of options, bonds and FX forwards.
+
+A scenario is one row of four shock columns:
+
+    spot      relative spot move, S -> S (1 + spot), applied to equities and FX
+    vol       absolute volatility bump, σ -> σ + vol
+    parallel  absolute shift of every zero rate
+    twist     change of the TWIST_SHORT-TWIST_LONG slope, pivoting around its middle
+
+Everything that does not depend on the shocks is computed once when the
+Portfolio is built: the options' base zero rates, the bonds' cash flows
+discounted off the base curve and netted by quantity into daily buckets,
+and the FX forwards split into a spot leg and bucketed strike legs. A
+shocked curve only rescales discount factors,
+
+    P'(t) = P(t) e^(-Δr(t) t)
+
+so bonds and forwards revalue as one matrix-vector product per chunk of
+scenarios, with the rescaling evaluated once per payment day. Options go
+through the vectorized batch.bsm_batch. Chunks of scenarios can be spread
+over worker processes, and results are written into one .npy file per
+column as each chunk arrives.
+"""
+
+import os
+
+import numpy as np
+
+from batch import bsm_batch
+
+TWIST_SHORT = 2.0
+TWIST_LONG = 10.0
+VOL_FLOOR = 1e-4
+SHOCK_FIELDS = ("spot", "vol", "parallel", "twist")
+VALUE_FIELDS = ("options", "bonds", "fx_forwards", "total", "pnl")
+# Upper bound on options × scenarios priced in one bsm_batch call
+OPTION_BATCH_ELEMENTS = 2 ** 20
+DAYS_PER_YEAR = 365
+
+
+def _daily_buckets(times, pv):
+    """Sum present values paid on the same day; returns (bucket times, bucket PVs)."""
+    days, inverse = np.unique(np.round(np.asarray(times) * DAYS_PER_YEAR), return_inverse=True)
+    return days / DAYS_PER_YEAR, np.bincount(inverse.ravel(), weights=np.ravel(pv))
+
+
+def shock_grid(spot=(0.0,), vol=(0.0,), parallel=(0.0,), twist=(0.0,)):
+    """Every combination of the given shock ladders, as a dictionary of equal-length columns."""
+    ladders = (np.atleast_1d(np.asarray(x, dtype=float)) for x in (spot, vol, parallel, twist))
+    mesh = np.meshgrid(*ladders, indexing="ij")
+    return {name: column.ravel() for name, column in zip(SHOCK_FIELDS, mesh)}
+
+
+def curve_shift(t, parallel, twist):
+    """
+    Zero-rate shift Δr(t) for each time (rows) and scenario (columns):
+
+    Δr(t) = parallel + twist (w(t) - 1/2),   w(t) = clip((t - t_short)/(t_long - t_short), 0, 1)
+    """
+    w = np.clip((np.asarray(t, dtype=float) - TWIST_SHORT) / (TWIST_LONG - TWIST_SHORT), 0, 1) - 0.5
+    return np.asarray(parallel)[None, :] + np.outer(w, twist)
+
+
+class Portfolio:
+    """
+    A book to be revalued under scenarios, all in the currency of `curve`.
+
+    curve: base discount curve (yield_curve.YieldCurve)
+    options: dictionary of arrays S0, K, T, sigma, quantity and option
+        ("call" or "put" per position, or one for all)
+    bonds: (bonds.BondPortfolio, quantity per bond)
+    fx_forwards: (forward_book.ForwardBook, spot per pair, foreign rate per pair);
+        every pair must be quoted in the curve's currency
+    """
+
+    def __init__(self, curve, options=None, bonds=None, fx_forwards=None):
+        self.curve = curve
+
+        if options is not None:
+            S0, K, T, sigma, quantity = np.broadcast_arrays(
+                *(np.atleast_1d(np.asarray(options[name], dtype=float))
+                  for name in ("S0", "K", "T", "sigma", "quantity")))
+            self.option_inputs = {"S0": S0, "K": K, "T": T, "sigma": sigma}
+            self.option_rate = curve.zero_rate(T)
+            self.option_quantity = quantity
+            option = np.broadcast_to(np.asarray(options.get("option", "call")), S0.shape)
+            if set(np.unique(option)) - {"call", "put"}:
+                raise ValueError("option must be 'call' or 'put'")
+            self.option_is_call = option == "call"
+        else:
+            self.option_quantity = np.empty(0)
+
+        self.bond_times, self.bond_pv = np.empty(0), np.empty(0)
+        if bonds is not None:
+            portfolio, quantity = bonds
+            grid, C = portfolio.cash_flow_grid()
+            flows = np.broadcast_to(np.asarray(quantity, dtype=float), (len(portfolio),)) @ C
+            self.bond_times, self.bond_pv = _daily_buckets(grid, flows * curve.discount(grid))
+
+        self.fx_spot_pv = 0.0
+        self.fx_times, self.fx_pv = np.empty(0), np.empty(0)
+        if fx_forwards is not None:
+            book, spot, foreign_rate = fx_forwards
+            tau = book.maturity
+            S, rf = (book.by_position(x) for x in (spot, foreign_rate))
+            self.fx_spot_pv = float(np.sum(book.notional * S * np.exp(-rf * tau)))
+            self.fx_times, self.fx_pv = _daily_buckets(tau, -book.notional * book.strike * curve.discount(tau))
+
+        self.base = None
+        self.base = {name: float(value[0]) for name, value in
+                     self.revalue({field: np.zeros(1) for field in SHOCK_FIELDS}).items()}
+
+    def _option_values(self, shocks):
+        n_options = self.option_quantity.size
+        n_scenarios = shocks["spot"].size
+        values = np.zeros(n_scenarios)
+        if n_options == 0:
+            return values
+
+        inputs = self.option_inputs
+        step = max(1, OPTION_BATCH_ELEMENTS // n_options)
+        for start in range(0, n_scenarios, step):
+            rows = slice(start, start + step)
+            spot, vol, parallel, twist = (shocks[field][rows] for field in SHOCK_FIELDS)
+            prices = bsm_batch(inputs["S0"][:, None] * (1 + spot),
+                               inputs["K"][:, None],
+                               inputs["T"][:, None],
+                               self.option_rate[:, None] + curve_shift(inputs["T"], parallel, twist),
+                               np.maximum(inputs["sigma"][:, None] + vol, VOL_FLOOR))
+            values[rows] = self.option_quantity @ np.where(self.option_is_call[:, None],
+                                                           prices["call"], prices["put"])
+        return values
+
+    def _cash_flow_values(self, times, pv, shocks):
+        if times.size == 0:
+            return np.zeros(shocks["spot"].size)
+        shift = curve_shift(times, shocks["parallel"], shocks["twist"])
+        return pv @ np.exp(-shift * times[:, None])
+
+    def revalue(self, shocks):
+        """Portfolio value by component for every scenario in `shocks` (columns as from shock_grid)."""
+        shocks = {field: np.atleast_1d(np.asarray(shocks[field], dtype=float)) for field in SHOCK_FIELDS}
+        values = {
+            "options": self._option_values(shocks),
+            "bonds": self._cash_flow_values(self.bond_times, self.bond_pv, shocks),
+            "fx_forwards": (self.fx_spot_pv * (1 + shocks["spot"])
+                            + self._cash_flow_values(self.fx_times, self.fx_pv, shocks)),
+        }
+        values["total"] = values["options"] + values["bonds"] + values["fx_forwards"]
+        values["pnl"] = values["total"] - (self.base["total"] if self.base is not None else values["total"])
+        return values
+
+
+_worker_portfolio = None
+
+
+def _init_worker(portfolio):
+    global _worker_portfolio
+    _worker_portfolio = portfolio
+
+
+def _revalue_chunk(chunk):
+    return _worker_portfolio.revalue(chunk)
+
+
+def run_scenarios(portfolio, shocks, output_dir=None, n_workers=1, chunk_size=4096):
+    """
+    Revalue the portfolio under every scenario.
+
+    Scenarios are processed in chunks of chunk_size rows, in worker processes
+    when n_workers > 1. With output_dir the shock and value columns go to
+    <output_dir>/<column>.npy as memory-mapped arrays, filled as chunks
+    complete, so grids larger than memory can be run. Returns a dictionary
+    of columns (memory-mapped when written to disk, see load_scenarios).
+    """
+    shocks = {field: np.atleast_1d(np.asarray(shocks[field], dtype=float)) for field in SHOCK_FIELDS}
+    n = shocks["spot"].size
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        columns = {name: np.lib.format.open_memmap(os.path.join(output_dir, f"{name}.npy"),
+                                                   mode="w+", dtype=float, shape=(n,))
+                   for name in SHOCK_FIELDS + VALUE_FIELDS}
+    else:
+        columns = {name: np.empty(n) for name in SHOCK_FIELDS + VALUE_FIELDS}
+
+    starts = range(0, n, chunk_size)
+    chunks = ({field: shocks[field][start:start + chunk_size] for field in SHOCK_FIELDS} for start in starts)
+
+    def store(start, chunk, values):
+        rows = slice(start, start + chunk_size)
+        for name, column in {**chunk, **values}.items():
+            columns[name][rows] = column
+
+    if n_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(portfolio,)) as pool:
+            chunks = list(chunks)
+            for start, chunk, values in zip(starts, chunks, pool.map(_revalue_chunk, chunks)):
+                store(start, chunk, values)
+    else:
+        for start, chunk in zip(starts, chunks):
+            store(start, chunk, portfolio.revalue(chunk))
+
+    for column in columns.values():
+        if isinstance(column, np.memmap):
+            column.flush()
+    return columns
+
+
+def load_scenarios(output_dir, mmap_mode="r"):
+    """Columns written by run_scenarios, memory-mapped by default."""
+    return {name: np.load(os.path.join(output_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in SHOCK_FIELDS + VALUE_FIELDS
+            if os.path.exists(os.path.join(output_dir, f"{name}.npy"))}
+
+
+if __name__ == "__main__":
+
+    import tempfile
+    import time
+
+    from bonds import BondPortfolio
+    from forward_book import ForwardBook
+    from yield_curve import YieldCurve
+
+    rng = np.random.default_rng(0)
+    curve = YieldCurve([0.5, 1, 2, 5, 10, 30], [0.030, 0.032, 0.035, 0.038, 0.041, 0.043])
+
+    n_options, n_bonds, n_forwards = 2000, 20000, 50000
+    options = {
+        "S0": 100.0,
+        "K": rng.uniform(70, 130, n_options),
+        "T": rng.uniform(0.1, 2, n_options),
+        "sigma": rng.uniform(0.15, 0.35, n_options),
+        "quantity": rng.integers(-50, 51, n_options),
+        "option": rng.choice(["call", "put"], n_options),
+    }
+    bonds = BondPortfolio(1000, rng.uniform(0.01, 0.07, n_bonds), rng.integers(1, 361, n_bonds) / 12)
+    forwards = ForwardBook(rng.uniform(-1e6, 1e6, n_forwards), rng.uniform(1.0, 1.2, n_forwards),
+                           rng.uniform(0.05, 2, n_forwards), "EURUSD")
+    portfolio = Portfolio(curve, options=options, bonds=(bonds, rng.integers(1, 100, n_bonds)),
+                          fx_forwards=(forwards, 1.08, 0.035))
+    print(f"Base value {portfolio.base['total']:,.0f} (options {portfolio.base['options']:,.0f}, "
+          f"bonds {portfolio.base['bonds']:,.0f}, FX forwards {portfolio.base['fx_forwards']:,.0f})")
+
+    try:
+        Portfolio(curve, options={**options, "option": "Put"})
+    except ValueError as error:
+        print(f"Rejected: {error}")
+    else:
+        raise AssertionError("Portfolio accepted option='Put'")
+
+    grid = shock_grid(spot=np.linspace(-0.3, 0.3, 25), vol=np.linspace(-0.1, 0.2, 7),
+                      parallel=np.linspace(-0.02, 0.02, 9), twist=np.linspace(-0.01, 0.01, 5))
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        run_scenarios(portfolio, grid, output_dir, chunk_size=1024)
+        elapsed = time.perf_counter() - start
+        results = load_scenarios(output_dir)
+        worst = int(np.argmin(results["pnl"]))
+        print(f"{results['pnl'].size} scenarios in {elapsed:.2f} s, worst P&L {results['pnl'][worst]:,.0f} at "
+              + ", ".join(f"{field} {results[field][worst]:+.3f}" for field in SHOCK_FIELDS))
+        del results
@@ -0,0 +1,230 @@
+"""
+Implied volatility surface built from a batch of option quotes.
+
+Quotes are turned into implied volatilities with the vectorized solver,
+fitted per expiry with raw SVI (or globally with SSVI) in log-moneyness
+k = ln(K/F), checked for butterfly and calendar arbitrage, and sampled
+once onto a uniform (k, T) grid of total variance w = σ^2 T. Lookups for
+arbitrary (K, T) are then bilinear interpolation with plain index
+arithmetic, O(1) per point and fully vectorized.
+"""
+
+import numpy as np
+
+from batch import bsm_batch
+from implied_vol import implied_vol, CONVERGED
+
+MODELS = ("svi", "ssvi")
+
+
+def svi_total_variance(k, a, b, rho, m, s):
+    """Raw SVI: w(k) = a + b(ρ(k - m) + sqrt((k - m)^2 + s^2))"""
+    return a + b * (rho * (k - m) + np.sqrt((k - m) ** 2 + s ** 2))
+
+
+def ssvi_total_variance(k, theta, rho, eta, gamma):
+    """
+    SSVI with power-law φ(θ) = η/θ^γ:
+
+    w(k, θ) = θ/2 (1 + ρφk + sqrt((φk + ρ)^2 + 1 - ρ^2))
+    """
+    phi = eta / theta ** gamma
+    return theta / 2 * (1 + rho * phi * k + np.sqrt((phi * k + rho) ** 2 + 1 - rho ** 2))
+
+
+def _fit_svi(k, w):
+    """Least-squares raw SVI fit of one expiry slice."""
+    from scipy.optimize import least_squares
+
+    def residuals(params):
+        return svi_total_variance(k, *params) - w
+
+    start = [max(w.min() / 2, 1e-6), 0.1, -0.3, 0.0, 0.1]
+    lower = [-1.0, 0.0, -0.999, 2 * k.min() - k.max(), 1e-4]
+    upper = [max(w.max(), 1e-4), 10.0, 0.999, 2 * k.max() - k.min(), 5.0]
+    return least_squares(residuals, start, bounds=(lower, upper)).x
+
+
+def _fit_ssvi(k, w, theta):
+    """
+    Joint SSVI fit over all quotes, with the ATM total variance θ of each
+    quote's expiry taken from the data. η(1 + |ρ|) <= 2 and γ in (0, 1/2]
+    keep the fit free of butterfly arbitrage (Gatheral-Jacquier).
+    """
+    from scipy.optimize import least_squares
+
+    def residuals(params):
+        rho, eta, gamma = params
+        eta = min(eta, 2 / (1 + abs(rho)))
+        return ssvi_total_variance(k, theta, rho, eta, gamma) - w
+
+    rho, eta, gamma = least_squares(residuals, [-0.3, 0.5, 0.3],
+                                    bounds=([-0.999, 1e-4, 1e-4], [0.999, 2.0, 0.5])).x
+    return rho, min(eta, 2 / (1 + abs(rho))), gamma
+
+
+class VolSurface:
+    """
+    Volatility surface on a uniform grid of log-moneyness k = ln(K/F) and expiry T.
+
+    Build it from quotes with VolSurface.from_quotes, or directly from implied
+    volatilities with the constructor.
+    """
+
+    def __init__(self, S0, r, K, T, vols, model="svi", n_k=201, n_t=101, k_range=None):
+        if model not in MODELS:
+            raise ValueError(f"model must be one of {', '.join(MODELS)}")
+
+        K, T, vols = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (K, T, vols)))
+        self.S0 = S0
+        self.r = r
+        self.model = model
+
+        k = np.log(K / (S0 * np.exp(r * T)))
+        w = vols ** 2 * T
+        self.expiries = np.unique(T)
+
+        if k_range is None:
+            k_range = (k.min(), k.max())
+        self.k_grid = np.linspace(k_range[0], k_range[1], n_k)
+        self.t_grid = np.linspace(0, self.expiries[-1], n_t)
+
+        # Total variance per fitted expiry on the k grid, shape (n_expiries, n_k)
+        slices = np.empty((self.expiries.size, n_k))
+        if model == "svi":
+            self.params = {}
+            for i, expiry in enumerate(self.expiries):
+                in_slice = T == expiry
+                self.params[expiry] = _fit_svi(k[in_slice], w[in_slice])
+                slices[i] = svi_total_variance(self.k_grid, *self.params[expiry])
+        else:
+            atm = np.array([np.interp(0.0, *self._sorted(k[T == e], w[T == e])) for e in self.expiries])
+            # Calendar arbitrage needs θ non-decreasing in T
+            atm = np.maximum.accumulate(atm)
+            theta = atm[np.searchsorted(self.expiries, T)]
+            self.params = dict(zip(("rho", "eta", "gamma"), _fit_ssvi(k, w, theta)))
+            self.params["theta"] = dict(zip(self.expiries, atm))
+            for i in range(self.expiries.size):
+                slices[i] = ssvi_total_variance(self.k_grid, atm[i], self.params["rho"],
+                                                self.params["eta"], self.params["gamma"])
+        self.slices = slices
+
+        self.grid = self._grid_from_slices(slices)
+        self._dk = self.k_grid[1] - self.k_grid[0]
+        self._dt = self.t_grid[1] - self.t_grid[0]
+
+    @staticmethod
+    def _sorted(k, w):
+        order = np.argsort(k)
+        return k[order], w[order]
+
+    @classmethod
+    def from_quotes(cls, S0, r, K, T, prices, option="call", **kwargs):
+        """Solve implied volatilities for a batch of quotes and build the surface from those that converge."""
+        K, T, prices = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (K, T, prices)))
+        vols, status = implied_vol(prices, S0, K, T, r, option=option)
+        solved = status == CONVERGED
+        return cls(S0, r, K[solved], T[solved], vols[solved], **kwargs)
+
+    def _grid_from_slices(self, slices):
+        """
+        Sample total variance on the uniform T grid: linear in T between fitted
+        expiries, scaled down to w = 0 at T = 0 before the first one, and at
+        constant implied volatility after the last one.
+        """
+        grid = np.empty((self.t_grid.size, self.k_grid.size))
+        first, last = self.expiries[0], self.expiries[-1]
+        for j, t in enumerate(self.t_grid):
+            if t <= first:
+                grid[j] = slices[0] * t / first
+            elif t >= last:
+                grid[j] = slices[-1] * t / last
+            else:
+                i = np.searchsorted(self.expiries, t)
+                weight = (t - self.expiries[i - 1]) / (self.expiries[i] - self.expiries[i - 1])
+                grid[j] = (1 - weight) * slices[i - 1] + weight * slices[i]
+        return grid
+
+    def total_variance(self, K, T):
+        """w(K, T) by bilinear interpolation on the precomputed grid (flat beyond its edges)."""
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+        k = np.log(K / (self.S0 * np.exp(self.r * T)))
+
+        x = np.clip((k - self.k_grid[0]) / self._dk, 0, self.k_grid.size - 1)
+        y = np.clip(T / self._dt, 0, self.t_grid.size - 1)
+        i = np.minimum(x.astype(np.intp), self.k_grid.size - 2)
+        j = np.minimum(y.astype(np.intp), self.t_grid.size - 2)
+        fx = x - i
+        fy = y - j
+
+        g = self.grid
+        w = ((1 - fy) * ((1 - fx) * g[j, i] + fx * g[j, i + 1])
+             + fy * ((1 - fx) * g[j + 1, i] + fx * g[j + 1, i + 1]))
+
+        # Past the last expiry keep the implied volatility constant
+        beyond = T > self.t_grid[-1]
+        return np.where(beyond, w * T / np.where(beyond, self.t_grid[-1], 1), w)
+
+    def vol(self, K, T):
+        """Implied volatility σ(K, T) = sqrt(w/T)."""
+        T = np.asarray(T, dtype=float)
+        return np.sqrt(self.total_variance(K, T) / T)
+
+    def price(self, K, T, t=0):
+        """Calls, puts, d1/d2 and Greeks priced off the surface volatilities (see batch.bsm_batch)."""
+        return bsm_batch(self.S0, K, T, self.r, self.vol(K, T), t=t)
+
+    def arbitrage_checks(self, tol=1e-10):
+        """
+        Static arbitrage checks on the fitted slices over the k grid.
+
+        butterfly: Gatheral's density condition per expiry,
+            g(k) = (1 - k w'/(2w))^2 - w'^2/4 (1/w + 1/4) + w''/2 >= 0
+        calendar: total variance non-decreasing in T for every k.
+
+        Returns a dictionary with, per expiry, the k values that violate each
+        condition (empty arrays mean the surface passes).
+        """
+        butterfly = {}
+        for expiry, w in zip(self.expiries, self.slices):
+            dw = np.gradient(w, self.k_grid)
+            d2w = np.gradient(dw, self.k_grid)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                g = ((1 - self.k_grid * dw / (2 * w)) ** 2
+                     - dw ** 2 / 4 * (1 / w + 1 / 4) + d2w / 2)
+            butterfly[expiry] = self.k_grid[~(g >= -tol) | (w <= 0)]
+
+        calendar = {}
+        for expiry, earlier, later in zip(self.expiries[1:], self.slices[:-1], self.slices[1:]):
+            calendar[expiry] = self.k_grid[later < earlier - tol]
+
+        return {"butterfly": butterfly, "calendar": calendar}
+
+
+if __name__ == "__main__":
+
+    S0 = 100
+    r = 0.05
+
+    # Synthetic quotes with a skew that flattens with maturity
+    expiries = np.array([0.25, 0.5, 1.0, 2.0])
+    strikes = np.linspace(70, 140, 29)
+    K, T = (x.ravel() for x in np.meshgrid(strikes, expiries))
+    k = np.log(K / (S0 * np.exp(r * T)))
+    true_vols = 0.2 - 0.1 * k / np.sqrt(T) + 0.05 * k ** 2
+    quotes = bsm_batch(S0, K, T, r, true_vols)["call"]
+
+    for model in MODELS:
+        surface = VolSurface.from_quotes(S0, r, K, T, quotes, model=model)
+        checks = surface.arbitrage_checks()
+        n_butterfly = sum(v.size for v in checks["butterfly"].values())
+        n_calendar = sum(v.size for v in checks["calendar"].values())
+        fit_error = np.max(np.abs(surface.vol(K, T) - true_vols))
+        print(f"{model}: max vol error {fit_error:.4f}, "
+              f"butterfly violations {n_butterfly}, calendar violations {n_calendar}")
+
+    lookup_K = np.random.default_rng(0).uniform(80, 120, 100000)
+    lookup_T = np.random.default_rng(1).uniform(0.1, 2.5, 100000)
+    priced = surface.price(lookup_K, lookup_T)
+    print(f"Priced {lookup_K.size} off-grid strikes from the surface, "
+          f"first call {priced['call'][0]:.4f}, vega {priced['vega'][0]:.4f}")